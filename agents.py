@@ -1,37 +1,856 @@
 import re  # for regular expression
-import PyPDF2  # to load and extract from pdf
 import io  # input/output
-from langchain_openai import OpenAIEmbeddings, ChatOpenAI  # using openaiembedding for creating vector db
-from langchain_community.vectorstores import FAISS  # importing faiss for vector db
-from langchain_text_splitters import RecursiveCharacterTextSplitter  # text splitter to divide text into split text
-from concurrent.futures import ThreadPoolExecutor  # thread pooler for doing multiple processes saath saath
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed  # thread pooler for doing multiple processes saath saath
 import tempfile
 import os
 import json
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
-from reportlab.lib.units import inch
-from docx import Document
+import math
+import hashlib
+import threading
+import copy
+import time
+from collections import OrderedDict, deque
+import numpy as np
+from models import model_registry, shared_http_client
+from structured import generate_structured
+
+# Heavy dependencies (langchain_openai, FAISS, text splitters, PyPDF2,
+# python-docx, reportlab) are imported inside the functions that use them,
+# so importing this module (every worker start, every first page) stays cheap.
+# Check with:  python bench_startup.py --importtime
+
+
+
+
+# -------------------- Resume-aware text splitter -------------------- #
+RESUME_SECTION_HEADINGS = {
+    "summary": "Summary",
+    "professional summary": "Summary",
+    "profile": "Summary",
+    "objective": "Summary",
+    "career objective": "Summary",
+    "about me": "Summary",
+    "experience": "Experience",
+    "work experience": "Experience",
+    "professional experience": "Experience",
+    "employment history": "Experience",
+    "work history": "Experience",
+    "internships": "Experience",
+    "internship": "Experience",
+    "projects": "Projects",
+    "personal projects": "Projects",
+    "academic projects": "Projects",
+    "key projects": "Projects",
+    "skills": "Skills",
+    "technical skills": "Skills",
+    "core skills": "Skills",
+    "key skills": "Skills",
+    "core competencies": "Skills",
+    "tools and technologies": "Skills",
+    "education": "Education",
+    "academic background": "Education",
+    "qualifications": "Education",
+    "certifications": "Certifications",
+    "certificates": "Certifications",
+    "licenses and certifications": "Certifications",
+    "achievements": "Achievements",
+    "accomplishments": "Achievements",
+    "awards": "Achievements",
+    "honors and awards": "Achievements",
+    "publications": "Publications",
+    "leadership": "Leadership",
+    "activities": "Activities",
+    "extracurricular activities": "Activities",
+    "volunteer experience": "Activities",
+    "languages": "Languages",
+    "interests": "Interests",
+    "hobbies": "Interests",
+}
+
+BULLET_PREFIXES = ("•", "●", "▪", "■", "◦", "‣", "–", "- ", "* ", "➢", "✓", "✔")
+
+
+class ResumeTextSplitter:
+    """Split resume text along section and bullet boundaries.
+
+    Every chunk stays inside one section and carries that section in its
+    metadata, so retrieval can target e.g. only the Experience section.
+    Bullets are never cut in half; only a single oversized bullet falls back
+    to a character split with a small overlap.
+    """
+
+    def __init__(self, chunk_size=800, fallback_overlap=50):
+        self.chunk_size = chunk_size
+        self.fallback_overlap = fallback_overlap
+        self._fallback_splitter = None
+
+    @property
+    def fallback_splitter(self):
+        if self._fallback_splitter is None:
+            from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+            self._fallback_splitter = RecursiveCharacterTextSplitter(
+                chunk_size=self.chunk_size,
+                chunk_overlap=self.fallback_overlap,
+                length_function=len,
+            )
+        return self._fallback_splitter
+
+    @staticmethod
+    def detect_heading(line):
+        """Return the canonical section name if the line is a heading."""
+        candidate = line.strip().strip(":").strip()
+        if not candidate or len(candidate) > 40:
+            return None
+        normalized = re.sub(r"[^a-z& ]", "", candidate.lower()).replace("&", "and")
+        normalized = " ".join(normalized.split())
+        return RESUME_SECTION_HEADINGS.get(normalized)
+
+    def split_sections(self, text):
+        """Return a list of (section, lines) in document order."""
+        sections = []
+        current_section = "Header"
+        current_lines = []
+
+        for line in text.split("\n"):
+            heading = self.detect_heading(line)
+            if heading:
+                if current_lines:
+                    sections.append((current_section, current_lines))
+                current_section = heading
+                current_lines = []
+            elif line.strip():
+                current_lines.append(line.strip())
+
+        if current_lines:
+            sections.append((current_section, current_lines))
+        return sections
+
+    @staticmethod
+    def group_bullets(lines):
+        """Merge wrapped continuation lines into the bullet they belong to."""
+        units = []
+        for line in lines:
+            if line.startswith(BULLET_PREFIXES) or not units:
+                units.append(line)
+            elif units[-1].startswith(BULLET_PREFIXES) and not line[:1].isupper():
+                units[-1] += " " + line
+            else:
+                units.append(line)
+        return units
+
+    def split_documents(self, text):
+        """Split resume text into section-tagged langchain Documents."""
+        documents = []
+
+        for section, lines in self.split_sections(text):
+            prefix = f"{section}:\n" if section != "Header" else ""
+            buffer = ""
+
+            for unit in self.group_bullets(lines):
+                if len(unit) > self.chunk_size:
+                    pieces = self.fallback_splitter.split_text(unit)
+                else:
+                    pieces = [unit]
+
+                for piece in pieces:
+                    if buffer and len(buffer) + len(piece) + 1 > self.chunk_size:
+                        documents.append(self._make_document(prefix + buffer, section))
+                        buffer = ""
+                    buffer = f"{buffer}\n{piece}" if buffer else piece
+
+            if buffer:
+                documents.append(self._make_document(prefix + buffer, section))
+
+        for i, doc in enumerate(documents):
+            doc.metadata["chunk_index"] = i
+
+        return documents
+
+    def split_text(self, text):
+        return [doc.page_content for doc in self.split_documents(text)]
+
+    @staticmethod
+    def _make_document(content, section):
+        return Document(page_content=content, metadata={"section": section})
+
+
+# -------------------- Hybrid BM25 + FAISS retrieval -------------------- #
+# Question filler that never helps lexical matching against a resume
+QUERY_STOPWORDS = {
+    "a", "an", "the", "and", "or", "of", "in", "on", "at", "to", "for", "with",
+    "by", "from", "as", "is", "are", "was", "were", "be", "been", "has", "have",
+    "had", "do", "does", "did", "what", "which", "who", "whom", "when", "where",
+    "why", "how", "any", "some", "there", "this", "that", "these", "those", "it",
+    "its", "their", "his", "her", "they", "he", "she", "s", "candidate",
+    "candidates", "resume", "cv", "mention", "mentions", "mentioned", "know",
+    "knows", "show", "shows", "list", "about", "can", "could", "would", "should",
+    "please", "tell", "me", "give", "much", "many", "if", "not", "no",
+}
+
+
+def tokenize(text):
+    """Lowercase word tokens, keeping tech names like c++, c#, node.js intact."""
+    tokens = re.findall(r"[a-z0-9][a-z0-9+#.\-]*", text.lower())
+    return [t.rstrip(".-") for t in tokens if t.rstrip(".-")]
+
+
+class BM25Index:
+    """Small in-memory Okapi BM25 index over a list of texts."""
+
+    def __init__(self, texts, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.doc_tokens = [tokenize(t) for t in texts]
+        self.doc_lens = [len(tokens) for tokens in self.doc_tokens]
+        self.avg_len = (sum(self.doc_lens) / len(self.doc_lens)) if self.doc_lens else 0.0
+        self.term_freqs = []
+        self.doc_freq = {}
+
+        for tokens in self.doc_tokens:
+            freqs = {}
+            for token in tokens:
+                freqs[token] = freqs.get(token, 0) + 1
+            self.term_freqs.append(freqs)
+            for token in freqs:
+                self.doc_freq[token] = self.doc_freq.get(token, 0) + 1
+
+        n = len(self.doc_tokens)
+        self.idf = {
+            term: math.log(1 + (n - df + 0.5) / (df + 0.5))
+            for term, df in self.doc_freq.items()
+        }
+        # Unseen terms are treated as maximally rare
+        self.max_idf = math.log(1 + (n + 0.5) / 0.5)
+
+    def score(self, query_terms):
+        """Return one BM25 score per document."""
+        scores = [0.0] * len(self.doc_tokens)
+        for term in query_terms:
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for i, freqs in enumerate(self.term_freqs):
+                tf = freqs.get(term)
+                if not tf:
+                    continue
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lens[i] / (self.avg_len or 1))
+                scores[i] += idf * tf * (self.k1 + 1) / (tf + norm)
+        return scores
+
+
+class HybridRetriever:
+    """BM25 + FAISS retrieval fused with reciprocal rank fusion (RRF).
+
+    When the lexical match is confident (the top BM25 chunk contains nearly
+    all the IDF mass of the question's keywords) the dense search is skipped,
+    which saves the query embedding call.
+    """
+
+    def __init__(self, documents, vectorstore, rrf_k=60, lexical_confidence=0.8):
+        self.documents = documents
+        self.vectorstore = vectorstore
+        self.rrf_k = rrf_k
+        self.lexical_confidence = lexical_confidence
+        self.bm25 = BM25Index([d.page_content for d in documents])
+        self.last_mode = None  # "lexical" | "hybrid", handy for debugging/stats
+
+    def keyword_confidence(self, query_terms, doc_index):
+        """IDF-weighted share of query keywords present in one document."""
+        if not query_terms:
+            return 0.0
+        doc_terms = self.bm25.term_freqs[doc_index]
+        total = sum(self.bm25.idf.get(t, self.bm25.max_idf) for t in query_terms)
+        matched = sum(self.bm25.idf[t] for t in query_terms if t in doc_terms)
+        return matched / total if total else 0.0
+
+    def _document_position(self, doc):
+        idx = doc.metadata.get("chunk_index") if doc.metadata else None
+        # An index patched in place keeps kept chunks' old chunk_index: verify it
+        if (
+            isinstance(idx, int) and 0 <= idx < len(self.documents)
+            and self.documents[idx].page_content == doc.page_content
+        ):
+            return idx
+        for i, candidate in enumerate(self.documents):
+            if candidate.page_content == doc.page_content:
+                return i
+        return None
+
+    def retrieve(self, query, k=4):
+        """Return the top-k resume chunks for a question."""
+        if len(self.documents) <= k:
+            self.last_mode = "lexical"
+            return list(self.documents)
+
+        query_terms = list(dict.fromkeys(
+            t for t in tokenize(query) if t not in QUERY_STOPWORDS
+        ))
+        bm25_scores = self.bm25.score(query_terms)
+        lexical_ranking = [
+            i for i in sorted(range(len(bm25_scores)), key=lambda i: -bm25_scores[i])
+            if bm25_scores[i] > 0
+        ]
+
+        if lexical_ranking and self.keyword_confidence(
+            query_terms, lexical_ranking[0]
+        ) >= self.lexical_confidence:
+            self.last_mode = "lexical"
+            return [self.documents[i] for i in lexical_ranking[:k]]
+
+        self.last_mode = "hybrid"
+        fetch_k = min(len(self.documents), k * 2)
+        dense_ranking = []
+        for doc in self.vectorstore.similarity_search(query, k=fetch_k):
+            position = self._document_position(doc)
+            if position is not None:
+                dense_ranking.append(position)
+
+        fused = {}
+        for ranking in (lexical_ranking[:fetch_k], dense_ranking):
+            for rank, i in enumerate(ranking):
+                fused[i] = fused.get(i, 0.0) + 1.0 / (self.rrf_k + rank + 1)
+
+        best = sorted(fused, key=lambda i: -fused[i])[:k]
+        return [self.documents[i] for i in best]
+
+
+# -------------------- Q&A caches -------------------- #
+# Recruiter-style example questions offered in the Q&A tab (and precomputed)
+EXAMPLE_QUESTIONS = [
+    "What is the candidate's most recent role?",
+    "What are the candidate's primary technical skills?",
+    "How many years of experience does the candidate have?",
+    "Does the candidate mention leadership or team management?",
+    "What projects has the candidate completed?",
+    "Are there measurable achievements in the resume?",
+    "Does the resume show domain expertise?",
+]
+
+
+# What the Interview and Improvement tabs ask for when left at their defaults;
+# these are what speculative prefetch generates ahead of the first click
+DEFAULT_INTERVIEW_TYPES = ["Basic", "Technical"]
+DEFAULT_INTERVIEW_DIFFICULTY = "Medium"
+DEFAULT_INTERVIEW_COUNT = 5
+DEFAULT_IMPROVEMENT_AREAS = ["Content", "Skills Highlighting"]
+
+
+def normalize_question(question):
+    """Canonical form used as the exact-match cache key for a question."""
+    cleaned = re.sub(r"[^\w\s+#.]", " ", question.lower())
+    return " ".join(cleaned.split()).rstrip(".")
+
+
+def text_hash(text):
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+
+def api_key_hash(client_or_key):
+    """Hash of an API key (or of a client's key) for coalescing keys.
+
+    Part of every SingleFlight key, so calls are only ever shared between
+    callers with the same credentials (and the same quota and errors).
+    """
+    key = getattr(client_or_key, "openai_api_key", client_or_key)
+    if hasattr(key, "get_secret_value"):
+        key = key.get_secret_value()
+    return text_hash(key if isinstance(key, str) else None)
+
+
+def skill_key(skill):
+    """Case/space-insensitive skill name for per-skill caches."""
+    return " ".join(str(skill).lower().split())
+
+
+def assign_chunk_ids(documents):
+    """Give chunks content-derived IDs (stable across re-uploads) in metadata."""
+    seen = {}
+    ids = []
+    for doc in documents:
+        base = text_hash(doc.page_content)[:24]
+        n = seen.get(base, 0)
+        seen[base] = n + 1
+        doc.metadata["chunk_id"] = f"{base}-{n}"
+        ids.append(doc.metadata["chunk_id"])
+    return ids
+
+
+# -------------------- Request coalescing -------------------- #
+class SingleFlight:
+    """Run concurrent calls that share a key only once.
+
+    The first caller computes; callers arriving while it is in flight wait
+    and receive the same result (or exception). Nothing is kept once the
+    call finishes: this deduplicates simultaneous work, it is not a cache.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}  # key -> Future
+        self.calls = 0
+        self.shared = 0
+
+    def do(self, key, fn):
+        with self._lock:
+            self.calls += 1
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+            else:
+                self.shared += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+
+# Process-wide, so identical work from different sessions/agents is shared
+analysis_flight = SingleFlight()
+embedding_flight = SingleFlight()
+llm_flight = SingleFlight()
+
+
+def invoke_llm(llm, prompt, task=None):
+    """llm.invoke(prompt), joined onto an identical call already in flight.
+
+    With a task, latency and token cost are recorded in the model registry
+    (once per real call, not per coalesced caller).
+    """
+    key = (
+        api_key_hash(llm),
+        getattr(llm, "model_name", None),
+        getattr(llm, "temperature", None),
+        getattr(llm, "max_tokens", None),
+        text_hash(prompt),
+    )
+
+    def call():
+        start = time.perf_counter()
+        try:
+            response = llm.invoke(prompt)
+        except Exception:
+            if task:
+                model_registry.record(task, llm.model_name, time.perf_counter() - start, error=True)
+            raise
+        if task:
+            model_registry.record(task, llm.model_name, time.perf_counter() - start, response)
+        return response
+
+    return llm_flight.do(key, call)
+
+
+def invoke_structured(llm, prompt, schema_name, task=None, on_item=None, repair_prompt=None):
+    """generate_structured (schema-constrained items), coalesced like invoke_llm."""
+    key = (
+        api_key_hash(llm),
+        getattr(llm, "model_name", None),
+        getattr(llm, "temperature", None),
+        getattr(llm, "max_tokens", None),
+        schema_name,
+        text_hash(prompt),
+    )
+    items = llm_flight.do(
+        key,
+        lambda: generate_structured(
+            llm, prompt, schema_name, task, on_item=on_item, repair_prompt=repair_prompt
+        ),
+    )
+    # Callers own their copy (the leader's list is shared with waiters)
+    return copy.deepcopy(items)
+
+
+class CachingEmbeddings(Embeddings):
+    """Embeddings wrapper that memoizes query vectors (bounded LRU).
+
+    The same instance backs FAISS and the semantic answer cache, so a
+    question is embedded at most once no matter how many lookups it needs.
+    """
+
+    def __init__(self, base, max_queries=512):
+        self.base = base
+        self.max_queries = max_queries
+        self._query_cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _flight_key(self, kind, payload):
+        return (
+            kind, api_key_hash(self.base), getattr(self.base, "model", None), text_hash(payload)
+        )
+
+    def embed_documents(self, texts):
+        key = self._flight_key("documents", "\0".join(texts))
+        return embedding_flight.do(key, lambda: self.base.embed_documents(texts))
+
+    def embed_query(self, text):
+        with self._lock:
+            if text in self._query_cache:
+                self._query_cache.move_to_end(text)
+                return self._query_cache[text]
+
+        vector = embedding_flight.do(
+            self._flight_key("query", text), lambda: self.base.embed_query(text)
+        )
+
+        with self._lock:
+            self._query_cache[text] = vector
+            if len(self._query_cache) > self.max_queries:
+                self._query_cache.popitem(last=False)
+        return vector
+
+
+class AnswerCache:
+    """Per-document answer cache.
+
+    Lookups try the normalized question first, then fall back to a semantic
+    match: a cached answer is reused when a cached question has the same
+    content terms (stopwords aside) and its embedding has cosine similarity
+    >= similarity_threshold with the new question's. ada-002 scores even
+    unrelated short questions around 0.8, hence both checks.
+
+    put() embeds nothing: questions are only embedded once a lookup shares
+    their terms (and the embeddings' own query cache usually has them from
+    retrieval already).
+    """
+
+    def __init__(self, embeddings=None, similarity_threshold=0.96):
+        self.embeddings = embeddings
+        self.similarity_threshold = similarity_threshold
+        self._answers = {}  # doc_hash -> {normalized question: (answer, source chunks)}
+        self._terms = {}  # doc_hash -> [(normalized question, question, content terms)]
+        self._vectors = {}  # question -> unit vector, filled on first semantic lookup
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _content_terms(question):
+        return frozenset(tokenize(question)) - QUERY_STOPWORDS
+
+    def _unit_vector(self, question):
+        with self._lock:
+            vector = self._vectors.get(question)
+        if vector is None:
+            vector = np.asarray(self.embeddings.embed_query(question), dtype=np.float32)
+            norm = np.linalg.norm(vector)
+            vector = vector / norm if norm else vector
+            with self._lock:
+                self._vectors[question] = vector
+        return vector
+
+    def get(self, doc_hash, question):
+        found = self.lookup(doc_hash, question)
+        return found[0] if found else None
+
+    def lookup(self, doc_hash, question):
+        """(answer, chunks it was answered from) for the question, or None."""
+        key = normalize_question(question)
+        with self._lock:
+            answers = self._answers.get(doc_hash, {})
+            if key in answers:
+                return answers[key]
+            terms = self._content_terms(key)
+            candidates = [
+                (cached, original) for cached, original, cached_terms in self._terms.get(doc_hash, [])
+                if cached_terms == terms
+            ]
+
+        if not candidates or self.embeddings is None:
+            return None
+
+        query_vector = self._unit_vector(question)
+        matrix = np.stack([self._unit_vector(original) for _, original in candidates])
+        similarities = matrix @ query_vector
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.similarity_threshold:
+            return None
+
+        with self._lock:
+            return self._answers.get(doc_hash, {}).get(candidates[best][0])
+
+    def put(self, doc_hash, question, answer, docs=None):
+        key = normalize_question(question)
 
+        with self._lock:
+            answers = self._answers.setdefault(doc_hash, {})
+            if key not in answers:
+                self._terms.setdefault(doc_hash, []).append(
+                    (key, question, self._content_terms(key))
+                )
+            answers[key] = (answer, list(docs or []))
+
+
+# -------------------- Conversation memory -------------------- #
+# Words that make a question lean on earlier turns ("tell me more about it")
+FOLLOW_UP_WORDS = {
+    "it", "its", "that", "this", "they", "them", "those", "these", "he", "she",
+    "his", "her", "their", "also", "more", "else", "same", "previous",
+}
+
+
+def estimate_tokens(text):
+    """Cheap token estimate (~4 characters per token for English)."""
+    return (len(text) + 3) // 4
+
+
+class ConversationMemory:
+    """Bounded multi-turn state for one resume.
+
+    Keeps the last `max_turns` turns verbatim and folds older ones into a
+    compact extractive summary, so the history sent to the LLM never exceeds
+    `token_budget`. It also remembers which chunks recent turns retrieved so
+    follow-ups can reuse them without another vector search.
+    """
+
+    def __init__(self, max_turns=3, token_budget=600, summary_line_chars=160):
+        self.max_turns = max_turns
+        self.token_budget = token_budget
+        self.summary_line_chars = summary_line_chars
+        self.turns = deque()  # (question, answer, [Document])
+        self.summary_lines = []
+
+    def is_follow_up(self, question):
+        """Only questions with nothing of their own to search for ("why?",
+        "tell me more") or that open with a reference ("that project...")."""
+        if not self.turns:
+            return False
+        words = tokenize(question)
+        content = set(words) - QUERY_STOPWORDS - FOLLOW_UP_WORDS
+        return not content or words[0] in FOLLOW_UP_WORDS
+
+    def add_turn(self, question, answer, docs):
+        self.turns.append((question, answer, list(docs or [])))
+        while len(self.turns) > self.max_turns:
+            old_question, old_answer, _ = self.turns.popleft()
+            first_sentence = re.split(r"(?<=[.!?])\s", old_answer.strip(), maxsplit=1)[0]
+            line = f"- {old_question} -> {first_sentence}"
+            self.summary_lines.append(line[: self.summary_line_chars])
+
+    def history_text(self):
+        """Summary + recent turns, trimmed (oldest first) to the token budget."""
+        recent = [f"Q: {q}\nA: {a}" for q, a, _ in self.turns]
+        summary = list(self.summary_lines)
+
+        def render():
+            parts = []
+            if summary:
+                parts.append("Earlier:\n" + "\n".join(summary))
+            parts.extend(recent)
+            return "\n".join(parts)
+
+        text = render()
+        while estimate_tokens(text) > self.token_budget and (summary or recent):
+            if summary:
+                summary.pop(0)
+            else:
+                recent.pop(0)
+            text = render()
+
+        self.summary_lines = self.summary_lines[len(self.summary_lines) - len(summary):]
+        return text
+
+    def reusable_chunks(self, question, retriever, k=4):
+        """Chunks from earlier turns that still answer this question, or None."""
+        if not self.turns:
+            return None
+
+        working_set = []
+        seen = set()
+        for _, _, docs in reversed(self.turns):
+            for doc in docs:
+                if doc.page_content not in seen:
+                    seen.add(doc.page_content)
+                    working_set.append(doc)
+
+        query_terms = [
+            t for t in tokenize(question)
+            if t not in QUERY_STOPWORDS and t not in FOLLOW_UP_WORDS
+        ]
+        if not query_terms:
+            # Pure follow-up ("why?", "tell me more") -> last turn's context
+            return self.turns[-1][2][:k] or None
+
+        if retriever is None:
+            return None
+
+        positions = [retriever._document_position(doc) for doc in working_set]
+        confident = [
+            doc for doc, position in zip(working_set, positions)
+            if position is not None
+            and retriever.keyword_confidence(query_terms, position) >= retriever.lexical_confidence
+        ]
+        return confident[:k] or None
+
+
+# -------------------- Skill scoring cascade -------------------- #
+def score_bucket(score):
+    """How semantic_skill_analysis reads a 0-10 score."""
+    if score <= 5:
+        return "missing"
+    if score >= 7:
+        return "strength"
+    return "neutral"
+
+
+class CascadeStats:
+    """Process-wide totals for the cheap -> strong skill scoring cascade."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.skills = 0
+        self.escalated = 0
+        self.compared = 0  # escalated skills the cheap model had also scored
+        self.agreed = 0  # ... where both models put the score in the same bucket
+
+    def record(self, skills, escalated, compared, agreed):
+        with self._lock:
+            self.skills += skills
+            self.escalated += escalated
+            self.compared += compared
+            self.agreed += agreed
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "skills": self.skills,
+                "escalated": self.escalated,
+                "strong_calls_saved": self.skills - self.escalated,
+                "savings_rate": (self.skills - self.escalated) / self.skills if self.skills else 0.0,
+                "agreement_rate": self.agreed / self.compared if self.compared else None,
+            }
 
 
+cascade_stats = CascadeStats()
+
+
+# -------------------- Quick-scan (embedding) scoring -------------------- #
+# Other names a resume may use for a skill; each is embedded next to the
+# skill name and the best-matching one counts. Keys are skill_key() forms.
+SKILL_ALIASES = {
+    "kubernetes": ["k8s"],
+    "javascript": ["js", "ecmascript"],
+    "typescript": ["ts"],
+    "node.js": ["nodejs", "node"],
+    "react": ["react.js", "reactjs"],
+    "vue": ["vue.js", "vuejs"],
+    "next.js": ["nextjs"],
+    "machine learning": ["ml"],
+    "deep learning": ["neural networks"],
+    "nlp": ["natural language processing"],
+    "computer vision": ["image recognition"],
+    "scikit-learn": ["sklearn"],
+    "hugging face": ["huggingface", "transformers"],
+    "postgresql": ["postgres"],
+    "sql & nosql databases": ["sql", "nosql", "mongodb", "postgresql"],
+    "rest apis": ["rest", "restful apis"],
+    "restful apis": ["rest", "rest apis"],
+    "ci/cd": ["continuous integration", "continuous delivery", "github actions"],
+    "aws": ["amazon web services"],
+    "gcp": ["google cloud", "google cloud platform"],
+    "azure": ["microsoft azure"],
+    "apache spark": ["spark", "pyspark"],
+    "airflow": ["apache airflow"],
+    "kafka": ["apache kafka"],
+    "dbt": ["data build tool"],
+    "etl pipelines": ["etl", "data pipelines"],
+    "promethus": ["prometheus"],
+    "site reliability engineering (sre)": ["sre", "site reliability"],
+    "a/b testing": ["ab testing", "split testing"],
+    "power bi": ["powerbi"],
+    "numpy": ["numerical python"],
+}
+
+# Aliases that are also everyday words: still embedded, but a literal match
+# doesn't count as the skill being mentioned
+AMBIGUOUS_ALIASES = {"rest", "node", "spark", "transformers", "ts"}
+
+# Cosine similarity -> 0-10 score, interpolated between anchor points, per
+# embedding model (their similarity ranges differ a lot). Refit from stored
+# deep-mode results with fit_quick_scan_calibration().
+QUICK_SCAN_CALIBRATION = {
+    "text-embedding-ada-002": ((0.70, 0), (0.75, 3), (0.78, 5), (0.81, 7), (0.86, 10)),
+    "text-embedding-3-small": ((0.15, 0), (0.25, 3), (0.32, 5), (0.40, 7), (0.55, 10)),
+    "text-embedding-3-large": ((0.10, 0), (0.20, 3), (0.27, 5), (0.35, 7), (0.50, 10)),
+}
+
+# Process-wide: skill names repeat across resumes, so embed each text once
+_alias_vectors = {}  # (embedding model, text) -> unit vector
+_alias_lock = threading.Lock()
+
+
+def mentions(text_lower, term):
+    """Whole-word (or whole-phrase) occurrence of term in lowercased text."""
+    term = term.lower()
+    if len(term) < 2:  # "R", "C": too ambiguous to count
+        return False
+    return re.search(rf"(?<![\w+#]){re.escape(term)}(?![\w+#])", text_lower) is not None
+
+
+def skill_aliases(skill):
+    """The skill followed by its known aliases."""
+    return [skill] + SKILL_ALIASES.get(skill_key(skill), [])
+
+
+def fit_quick_scan_calibration(similarities, scores, levels=(0, 3, 5, 7, 10)):
+    """Anchor points from (quick-scan similarity, deep-mode score) pairs.
+
+    Each level's anchor is the median similarity of the skills the LLM
+    scored closest to it; anchors are kept increasing so the map stays
+    monotonic.
+    """
+    similarities = np.asarray(similarities, dtype=float)
+    scores = np.asarray(scores, dtype=float)
+    levels = np.asarray(levels, dtype=float)
+    nearest = np.abs(scores[:, None] - levels[None, :]).argmin(axis=1)
+    anchors = []
+    for i, level in enumerate(levels):
+        matched = similarities[nearest == i]
+        if len(matched):
+            anchors.append((float(np.median(matched)), int(level)))
+    xs = np.maximum.accumulate([x for x, _ in anchors]) if anchors else []
+    return tuple((float(x), level) for x, (_, level) in zip(xs, anchors))
+
 
 # -------------------- Simple QA (uses FAISS directly) -------------------- #
 class SimpleQA:
     """Minimal QA helper (no RetrievalQA, no retriever.get_relevant_documents)."""
 
-    def __init__(self, api_key, vectorstore, model="gpt-4o"):
+    def __init__(self, api_key, vectorstore, task="qa", retriever=None):
         self.api_key = api_key
         self.vectorstore = vectorstore  # FAISS object directly
-        self.llm = ChatOpenAI(model=model, api_key=api_key)
+        self.retriever = retriever  # optional HybridRetriever over the same chunks
+        self.task = task  # model registry route
+        self.llm = model_registry.chat(task, api_key)
+
+    def run(self, query: str, history: str = "", docs=None) -> str:
+        """Retrieve relevant chunks and answer based ONLY on resume content.
 
-    def run(self, query: str) -> str:
-        """Retrieve relevant chunks and answer based ONLY on resume content."""
+        `docs` skips retrieval (e.g. chunks reused from an earlier turn) and
+        `history` is a compact transcript of the conversation so far.
+        """
 
-        # FAISS similarity search: works in all LangChain versions
-        docs = self.vectorstore.similarity_search(query, k=4)
+        if docs is None and self.retriever is not None:
+            docs = self.retriever.retrieve(query, k=4)
+        elif docs is None:
+            # FAISS similarity search: works in all LangChain versions
+            docs = self.vectorstore.similarity_search(query, k=4)
+        self.last_docs = docs
         context = "\n\n".join(d.page_content for d in docs)
 
+        history_block = f"Conversation so far:\n{history}\n" if history else ""
+
         prompt = f"""
 You are an assistant analyzing a candidate's resume.
 Use ONLY the following resume content to answer the question.
@@ -39,6 +858,7 @@ Use ONLY the following resume content to answer the question.
 Resume Content:
 {context}
 
+{history_block}
 Question: {query}
 
 If the answer is not present in the resume, reply:
@@ -46,16 +866,64 @@ If the answer is not present in the resume, reply:
 
 Answer:
 """
-        response = self.llm.invoke(prompt)
+        response = invoke_llm(self.llm, prompt, self.task)
         return response.content.strip()
 
 
 class ResumeAnalysisAgent:
-    def __init__(self, api_key, cutoff_score=75):
+    rag_chunk_size = 800  # characters per Q&A chunk (see ResumeTextSplitter)
+    # Skill scoring cascade: the "screening" model scores every skill in one
+    # batch and only scores inside escalation_band (around the <=5 missing /
+    # >=7 strength thresholds) are re-scored by the "scoring" model.
+    # Models per task are routed by models.model_registry.
+    use_scoring_cascade = True
+    escalation_band = (4, 7)
+    # The batched screening call also writes weakness details for skills it
+    # scores <= 6, so no separate weaknesses call is needed for them
+    fuse_weaknesses = True
+    # Re-uploads sharing at least this share of chunks are patched, not redone
+    incremental_min_overlap = 0.5
+    # Upper bound on estimated spend for speculative prefetch per analysis
+    prefetch_budget_usd = 0.10
+    # Bump when prompts or scoring change, so stored results are not reused
+    analysis_version = 1
+    # Quick scan: a skill named outright in the resume scores at least this;
+    # anchor points override QUICK_SCAN_CALIBRATION when set
+    quick_scan_mention_floor = 7
+    quick_scan_calibration = None
+    embedding_model = "text-embedding-ada-002"
+
+    def __init__(self, api_key, cutoff_score=75, precompute_example_answers=True,
+                 speculative_prefetch=False, results_store=None, scoring_mode="deep"):
         self.api_key = api_key
+        self.scoring_mode = scoring_mode  # "deep" (LLM scoring) or "quick" (embeddings only)
         self.cutoff_score = cutoff_score
         self.resume_text = None
         self.rag_vectorstore = None  # FAISS for Q&A
+        self.rag_chunks = []  # section-tagged Documents behind rag_vectorstore
+        self.rag_retriever = None  # HybridRetriever (BM25 + FAISS) for Q&A
+        self.resume_hash = None
+        self.embeddings = None  # CachingEmbeddings shared by FAISS + answer cache
+        self.answer_cache = AnswerCache()
+        self.precompute_example_answers = precompute_example_answers
+        self._pending_answers = {}  # (resume_hash, normalized question) -> Future
+        self.speculative_prefetch = speculative_prefetch
+        self.results_store = results_store  # results_store.ResultsStore, optional
+        self._prefetch_generation = 0  # bumped to invalidate in-flight prefetch
+        self._prefetch_futures = []
+        self._prefetched_questions = None  # (params key, Future) for default interview questions
+        self.prefetch_plan = None  # what the last prefetch scheduled, and its estimated cost
+        self.conversations = {}  # resume_hash -> ConversationMemory
+        self.resume_profile = None  # structured JSON profile of the resume
+        self._skill_vectors = {}  # skill name -> embedding (evidence lookup)
+        # Per-skill results for the current resume, reused when the JD/role changes
+        self._skill_cache_hash = None
+        self._skill_scores_cache = {}  # skill_key -> (score, reasoning)
+        self._weakness_cache = {}  # skill_key -> weakness entry
+        self._jd_skills = OrderedDict()  # JD text hash -> extracted skills
+        self._improvement_cache = OrderedDict()  # (resume_hash, area, role) -> improvement
+        self._profile_hash = None
+        self._background_executor = None
         self.analysis_result = None
         self.jd_text = None
         self.extracted_skills = None
@@ -69,6 +937,8 @@ class ResumeAnalysisAgent:
 
     def extract_text_from_pdf(self, pdf_file):
         """Extract text from a PDF file"""
+        import PyPDF2
+
         try:
             if hasattr(pdf_file, "getvalue"):
                 pdf_data = pdf_file.getvalue()
@@ -90,11 +960,13 @@ class ResumeAnalysisAgent:
         
     def extract_text_from_docx(self, docx_file):
         """Extract text from DOCX file"""
+        from docx import Document as DocxDocument
+
         try:
             if hasattr(docx_file, "read"):
-                document = Document(docx_file)
+                document = DocxDocument(docx_file)
             else:
-                document = Document(docx_file)
+                document = DocxDocument(docx_file)
 
             full_text = []
             for para in document.paragraphs:
@@ -141,21 +1013,69 @@ class ResumeAnalysisAgent:
     #           VECTOR STORES (FAISS)
     # ----------------------------------------------------------
 
+    def _openai_embeddings(self):
+        from langchain_openai import OpenAIEmbeddings
+
+        return CachingEmbeddings(
+            OpenAIEmbeddings(
+                model=self.embedding_model,
+                api_key=self.api_key,
+                http_client=shared_http_client(),
+            )
+        )
+
+    def set_api_key(self, api_key):
+        """Use api_key for every later call, embeddings included.
+
+        The CachingEmbeddings wrapper (shared by FAISS, the retriever and the
+        answer cache) keeps its query cache; only the client under it is
+        rebuilt, since OpenAIEmbeddings binds its key at construction.
+        """
+        if api_key == self.api_key:
+            return
+        self.api_key = api_key
+        if self.embeddings is not None:
+            self.embeddings.base = self._openai_embeddings().base
+
     def create_rag_vector_store(self, text):
         """Create a vector store for RAG (for Q&A tab)"""
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,
-            chunk_overlap=200,
-            length_function=len,
-        )
-        chunks = text_splitter.split_text(text)
-        embeddings = OpenAIEmbeddings(api_key=self.api_key)
-        vectorstore = FAISS.from_texts(chunks, embeddings)
+        from langchain_community.vectorstores import FAISS
+
+        # Section-aware chunks: no cross-section cuts, near-zero overlap
+        text_splitter = ResumeTextSplitter(chunk_size=self.rag_chunk_size)
+        self.rag_chunks = text_splitter.split_documents(text)
+        chunk_ids = assign_chunk_ids(self.rag_chunks)
+        self.embeddings = self._openai_embeddings()
+        self.answer_cache.embeddings = self.embeddings
+        vectorstore = FAISS.from_documents(self.rag_chunks, self.embeddings, ids=chunk_ids)
         return vectorstore
 
+    def patch_rag_vector_store(self, chunks):
+        """Update the Q&A index in place: embed only new chunks, drop removed ones.
+
+        `chunks` must already carry IDs from assign_chunk_ids.
+        Returns (added, removed) chunk counts.
+        """
+        old_ids = {doc.metadata.get("chunk_id") for doc in self.rag_chunks}
+        new_ids = {doc.metadata["chunk_id"] for doc in chunks}
+
+        removed = list(old_ids - new_ids)
+        added = [doc for doc in chunks if doc.metadata["chunk_id"] not in old_ids]
+        if removed:
+            self.rag_vectorstore.delete(removed)
+        if added:
+            self.rag_vectorstore.add_documents(
+                added, ids=[doc.metadata["chunk_id"] for doc in added]
+            )
+
+        self.rag_chunks = chunks
+        return len(added), len(removed)
+
     def create_vector_store(self, text):
         """Create a simple vector store for skill analysis"""
-        embeddings = OpenAIEmbeddings(api_key=self.api_key)
+        from langchain_community.vectorstores import FAISS
+
+        embeddings = self._openai_embeddings()
         vectorstore = FAISS.from_texts([text], embeddings)
         return vectorstore
 
@@ -166,54 +1086,97 @@ class ResumeAnalysisAgent:
     def extract_skills_from_jd(self, jd_text):
         """Extract skills from a job description using LLM."""
         try:
-            llm = ChatOpenAI(model="gpt-4o", api_key=self.api_key)
-            prompt = f"""Extract a comprehensive list of technical skills, tools, technologies, and competencies required from this job description. 
-Return ONLY a valid JSON list of strings. Example: ["Python", "SQL", "Machine Learning"]
+            llm = model_registry.chat("jd_extraction", self.api_key)
+            prompt = f"""Extract a comprehensive list of technical skills, tools, technologies, and competencies required from this job description.
+Return them as JSON: {{"skills": ["Python", "SQL", "Machine Learning"]}}
 
 Job Description:
 {jd_text}
 """
-            response = llm.invoke(prompt)
-            skills_text = response.content.strip()
-
-            # Try to parse JSON list directly
-            try:
-                skills_list = json.loads(skills_text)
-                if isinstance(skills_list, list):
-                    return [s.strip() for s in skills_list if isinstance(s, str)]
-            except Exception:
-                pass
-
-            # Fallback: extract between [ ]
-            match = re.search(r"\[(.*?)\]", skills_text, re.DOTALL)
-            if match:
-                inner = "[" + match.group(1) + "]"
-                try:
-                    skills_list = json.loads(inner)
-                    if isinstance(skills_list, list):
-                        return [s.strip() for s in skills_list if isinstance(s, str)]
-                except Exception:
-                    pass
-
-            # Last fallback: bullet/line based
-            skills = []
-            for line in skills_text.split("\n"):
-                line = line.strip()
-                if not line:
-                    continue
-                if line.startswith("- ") or line.startswith("* "):
-                    skill = line[2:].strip()
-                else:
-                    skill = line
-                if skill:
-                    skills.append(skill)
-
-            return skills
+            skills = invoke_structured(llm, prompt, "jd_skills", "jd_extraction")
+            return list(dict.fromkeys(s.strip() for s in skills if s.strip()))
 
         except Exception as e:
             print(f"Error extracting skills from job description: {e}")
             return []
 
+    # ----------------------------------------------------------
+    #      STRUCTURED RESUME PROFILE (extracted once, reused)
+    # ----------------------------------------------------------
+
+    def _resume_snapshot(self, resume=None):
+        """(resume hash, resume text): the given snapshot, else the current resume.
+
+        Background work captures the snapshot when it is submitted, so a
+        resume uploaded meanwhile never leaks into (or receives) its results.
+        """
+        return resume or (self.resume_hash, self.resume_text)
+
+    def extract_resume_profile(self, resume=None):
+        """Turn the resume into a compact JSON profile (one LLM call per resume).
+
+        The profile is cached on the agent by resume hash and used as compact
+        context by the interview and improvement prompts instead of
+        re-sending the raw resume text. The full rewrite still gets the raw
+        text: the profile drops contact details and shortens achievements.
+        """
+        resume_hash, resume_text = self._resume_snapshot(resume)
+        if not resume_text:
+            return None
+        if self._profile_hash == resume_hash:
+            return self.resume_profile
+
+        try:
+            llm = model_registry.chat("profile", self.api_key)
+            prompt = f"""Extract a structured profile from this resume.
+Return ONLY valid JSON with exactly these keys:
+{{
+  "name": "...",
+  "headline": "one-line professional summary",
+  "roles": [{{"title": "...", "company": "...", "start": "...", "end": "...", "highlights": ["short achievement", "..."]}}],
+  "skills": [{{"name": "...", "evidence": "short verbatim phrase from the resume showing it"}}],
+  "projects": [{{"name": "...", "summary": "...", "technologies": ["..."]}}],
+  "education": [{{"degree": "...", "institution": "...", "year": "..."}}],
+  "certifications": ["..."],
+  "achievements": ["..."]
+}}
+Keep every value short. Keep numbers and metrics exactly as written. Do not invent anything.
+
+Resume:
+{resume_text}
+"""
+            response = invoke_llm(llm, prompt, "profile")
+            raw = response.content.strip()
+
+            json_match = re.search(r"\{.*\}", raw, re.DOTALL)
+            profile = json.loads(json_match.group(0)) if json_match else None
+            if not isinstance(profile, dict):
+                raise ValueError("No JSON object in profile response")
+
+        except Exception as e:
+            print(f"Error extracting resume profile: {e}")
+            # Remember the failure so every tab doesn't retry; callers fall back to raw text
+            profile = None
+
+        # Only the current resume's profile is kept (a newer upload may have replaced it)
+        if resume_hash == self.resume_hash:
+            self.resume_profile = profile
+            self._profile_hash = resume_hash
+        return profile
+
+    def resume_context(self, max_chars=None, resume=None):
+        """Compact resume context: the JSON profile, or raw text as a fallback."""
+        profile = self.extract_resume_profile(resume)
+        if profile:
+            return "Resume Profile (JSON):\n" + json.dumps(
+                profile, ensure_ascii=False, separators=(",", ":")
+            )
+
+        text = self._resume_snapshot(resume)[1] or ""
+        if max_chars and len(text) > max_chars:
+            text = text[:max_chars] + "..."
+        return f"Resume Content:\n{text}"
+
     # ----------------------------------------------------------
     #           SKILL ANALYSIS
     # ----------------------------------------------------------
@@ -237,65 +1200,58 @@ Job Description:
 
         return skill, min(score, 10), reasoning
 
-    def analyze_resume_weaknesses(self):
+    def analyze_resume_weaknesses(self, skills=None):
         """
         Generate weaknesses + suggestions + example bullets.
         Automatically fixes JSON code-block parsing issues.
+
+        `skills` limits generation to those skills and returns the entries
+        without replacing self.resume_weaknesses (incremental re-analysis).
         """
 
-        missing_skills = self.analysis_result.get("missing_skills", [])
+        missing_skills = skills if skills is not None else self.analysis_result.get("missing_skills", [])
         if not missing_skills:
-            self.resume_weaknesses = []
+            if skills is None:
+                self.resume_weaknesses = []
             return []
 
-        llm = ChatOpenAI(model="gpt-4o", api_key=self.api_key)
+        llm = model_registry.chat("weaknesses", self.api_key)
 
-        prompt = f"""
+        def weakness_prompt(skills_to_explain):
+            return f"""
 You are an expert resume analyst.
 
 Resume:
 {self.resume_text[:3500]}
 
 Missing skills:
-{missing_skills}
+{skills_to_explain}
 
-For EACH skill return JSON:
-[
+For EACH skill return an entry in JSON:
+{{"weaknesses": [
   {{
     "skill": "...",
     "detail": "...",
     "suggestions": ["...", "..."],
     "example": "One resume bullet fixing the weakness"
   }}
-]
+]}}
 """
 
-        response = llm.invoke(prompt)
-        raw = response.content.strip()
-
-        # 🔥 NEW: remove code block wrappers if present
-        import re
-
-        # 🔥 FORCE extract JSON array only
-        json_match = re.search(r"\[\s*{.*}\s*\]", raw, re.DOTALL)
+        def remaining_prompt(received):
+            # Tail repair: ask again only for the skills the broken reply missed
+            covered = {skill_key(item["skill"]) for item in received}
+            remaining = [s for s in missing_skills if skill_key(s) not in covered]
+            return weakness_prompt(remaining) if remaining else None
 
-        if not json_match:
-            print("❌ No JSON array found in LLM output")
-            print(raw)
-            return []
-
-        raw_json = json_match.group(0)
-
-        try:
-            parsed = json.loads(raw_json)
-        except Exception as e:
-            print("❌ JSON parse failed after extraction")
-            print(raw_json)
+        parsed = invoke_structured(
+            llm, weakness_prompt(missing_skills), "weaknesses", "weaknesses",
+            repair_prompt=remaining_prompt,
+        )
+        if not parsed:
+            print("❌ No weaknesses parsed from LLM output")
             return []
 
-
-        
-
         final_list = []
 
         for item in parsed:
@@ -315,35 +1271,135 @@ For EACH skill return JSON:
                 "example": example
             })
 
-        self.resume_weaknesses = final_list
+        if skills is None:
+            self.resume_weaknesses = final_list
         return final_list
 
 
-    def semantic_skill_analysis(self, resume_text, skills):
-        """Analyze skills semantically (same logic, no RetrievalQA)."""
-        vectorstore = self.create_vector_store(resume_text)
+    def screen_skills(self, resume_text, skills):
+        """Cheap first pass: score all skills in one call.
+
+        Returns ({skill: (score, reasoning)}, {skill: weakness entry}). Skills
+        missing from the reply are left out, so the caller sends them to the
+        strong model. Weakness entries (detail, suggestions, example) come
+        back for skills scored <= 6 when fuse_weaknesses is on.
+        """
+        fused = self.fuse_weaknesses
+        weakness_instructions = """
+For every skill you score 6 or lower, also fill:
+- "detail": what the resume lacks for this skill
+- "suggestions": 2-3 concrete ways to show it
+- "example": one resume bullet fixing the weakness
+For skills scored 7 or higher leave detail and example as "" and suggestions as [].""" if fused else ""
+        weakness_fields = ', "detail": "...", "suggestions": ["..."], "example": "..."' if fused else ""
+
+        try:
+            llm = model_registry.chat("screening", self.api_key)
+            prompt = f"""You are screening a resume against a list of skills.
+For EACH skill, rate 0-10 how clearly the resume demonstrates proficiency in it
+(0 = not mentioned, 10 = clearly demonstrated with concrete experience).{weakness_instructions}
+Return JSON: {{"scores": [{{"skill": "<skill exactly as given>", "score": <0-10>, "reasoning": "one short sentence"{weakness_fields}}}]}}
+
+Skills:
+{json.dumps(skills, ensure_ascii=False)}
+
+Resume:
+{resume_text}
+"""
+            # No tail repair: unanswered skills are escalated to the strong model anyway
+            parsed = invoke_structured(
+                llm, prompt, "skill_assessment" if fused else "skill_screening", "screening",
+                repair_prompt=lambda items: None,
+            )
+        except Exception as e:
+            print(f"Error screening skills: {e}")
+            return {}, {}
+
+        by_key = {skill_key(item["skill"]): item for item in parsed}
+        screened = {}
+        weaknesses = {}
+        for skill in skills:
+            item = by_key.get(skill_key(skill))
+            if item is None:
+                continue
+            score = max(0, min(int(item["score"]), 10))
+            screened[skill] = (score, item["reasoning"])
+            if fused and score <= 6 and item.get("detail"):
+                weaknesses[skill] = {
+                    "skill": skill,
+                    "detail": item["detail"],
+                    "suggestions": item["suggestions"],
+                    "example": item["example"]
+                    or f"Implemented a {skill}-based solution with measurable impact.",
+                }
+        return screened, weaknesses
 
-        # SimpleQA uses FAISS directly
-        qa_chain = SimpleQA(api_key=self.api_key, vectorstore=vectorstore)
+    def score_skills(self, resume_text, skills):
+        """Score skills through the cascade.
 
+        Returns ({skill: (score, reasoning)}, cascade counts, {skill: weakness
+        entry}) - the last holding fused weaknesses for skills still <= 6.
+        """
+        screened, fused_weaknesses = (
+            self.screen_skills(resume_text, skills) if self.use_scoring_cascade else ({}, {})
+        )
+        low, high = self.escalation_band
+        escalate = [
+            skill for skill in skills
+            if skill not in screened or low <= screened[skill][0] <= high
+        ]
+
+        strong = {}
+        if escalate:
+            vectorstore = self.create_vector_store(resume_text)
+
+            # SimpleQA uses FAISS directly
+            qa_chain = SimpleQA(
+                api_key=self.api_key, vectorstore=vectorstore, task="scoring"
+            )
+
+            with ThreadPoolExecutor(max_workers=5) as executor:
+                for skill, score, reasoning in executor.map(
+                    lambda skill: self.analyze_skills(qa_chain, skill), escalate
+                ):
+                    strong[skill] = (score, reasoning)
+
+        compared = [skill for skill in escalate if skill in screened]
+        agreed = sum(
+            score_bucket(screened[skill][0]) == score_bucket(strong[skill][0])
+            for skill in compared
+        )
+        cascade_stats.record(len(skills), len(escalate), len(compared), agreed)
+
+        scored = {skill: strong.get(skill) or screened[skill] for skill in skills}
+        cascade = {
+            "screened": len(screened),
+            "escalated": len(escalate),
+            "strong_calls_saved": len(skills) - len(escalate),
+            "agreement_rate": agreed / len(compared) if compared else None,
+        }
+        weaknesses = {
+            skill: entry for skill, entry in fused_weaknesses.items()
+            if scored[skill][0] <= 6
+        }
+        return scored, cascade, weaknesses
+
+    def summarize_skill_scores(self, skills, scored, cascade=None):
+        """Aggregate per-skill (score, reasoning) into the analysis result."""
         skill_scores = {}
         skill_reasoning = {}
         missing_skills = []
         total_score = 0
 
-        with ThreadPoolExecutor(max_workers=5) as executor:
-            results = list(
-                executor.map(lambda skill: self.analyze_skills(qa_chain, skill), skills)
-            )
-
-        for skill, score, reasoning in results:
+        for skill in skills:
+            score, reasoning = scored[skill]
             skill_scores[skill] = score
             skill_reasoning[skill] = reasoning
             total_score += score
             if score <= 5:
                 missing_skills.append(skill)
 
-        overall_score = int((total_score / (10 * len(skills))) * 100)
+        overall_score = int((total_score / (10 * len(skills))) * 100) if skills else 0
         selected = overall_score >= self.cutoff_score
 
         reasoning = "Candidate evaluated based on explicit resume content using semantic similarity and clear numeric scoring."
@@ -361,11 +1417,313 @@ For EACH skill return JSON:
             "missing_skills": missing_skills,
             "strengths": strengths,
             "improvement_areas": improvement_areas,
+            "scoring_cascade": cascade,
         }
 
-    def analyze_resume(self, resume_file, role_requirements=None, custom_jd=None):
-        """Analyze a resume against role requirements or a custom JD"""
-        self.resume_text = self.extract_text_from_file(resume_file)
+    def semantic_skill_analysis(self, resume_text, skills):
+        """Analyze skills semantically (same logic, no RetrievalQA)."""
+        scored, cascade, _ = self.score_skills(resume_text, skills)
+        return self.summarize_skill_scores(skills, scored, cascade)
+
+    # ----------------------------------------------------------
+    #      QUICK SCAN (embedding similarity, no LLM calls)
+    # ----------------------------------------------------------
+
+    def quick_scan(self, skills):
+        """Score skills from embeddings alone, for first-pass triage.
+
+        Skill names and their aliases are embedded once per process; the
+        resume side reuses the Q&A index's chunk vectors. One matrix product
+        gives every (alias, chunk) cosine similarity, each skill keeps its
+        best, and QUICK_SCAN_CALIBRATION maps that to 0-10. Needs the Q&A
+        index (built by analyze_resume). Returns the analysis result dict.
+        """
+        start = time.perf_counter()
+        scored, skill_similarity = self._quick_scan_scores(skills) if skills else ({}, [])
+
+        result = self.summarize_skill_scores(skills, scored)
+        result.update({
+            "scoring_mode": "quick",
+            "reasoning": "Quick scan: skills scored by embedding similarity to the "
+                         "resume, without LLM review. Run a deep analysis for "
+                         "detailed reasoning and weaknesses.",
+            "quick_scan_similarity": {
+                skill: round(float(sim), 4) for skill, sim in zip(skills, skill_similarity)
+            },
+            "scan_seconds": round(time.perf_counter() - start, 4),
+            "detailed_weaknesses": [],
+            "detailed_weakness": [],
+        })
+        return result
+
+    def _quick_scan_scores(self, skills):
+        """({skill: (score, reasoning)}, best similarity per skill) for quick_scan."""
+        model = self.embedding_model
+
+        texts, owners = [], []
+        for i, skill in enumerate(skills):
+            for alias in skill_aliases(skill):
+                texts.append(alias)
+                owners.append(i)
+        owners = np.asarray(owners)
+        starts = np.flatnonzero(np.r_[True, owners[1:] != owners[:-1]])
+
+        chunk_matrix, chunk_docs = self._chunk_matrix()
+        similarity = self._alias_matrix(model, texts) @ chunk_matrix.T
+        best_chunk = similarity.argmax(axis=1)
+        best = similarity[np.arange(len(texts)), best_chunk]
+        skill_similarity = np.maximum.reduceat(best, starts)
+
+        anchors = self.quick_scan_calibration or QUICK_SCAN_CALIBRATION[model]
+        xs, ys = zip(*anchors)
+        scores = np.rint(np.interp(skill_similarity, xs, ys)).astype(int)
+
+        resume_lower = self.resume_text.lower()
+        scored = {}
+        for i, skill in enumerate(skills):
+            rows = np.flatnonzero(owners == i)
+            row = rows[best[rows].argmax()]
+            section = chunk_docs[best_chunk[row]].metadata.get("section") or "resume"
+            score = int(scores[i])
+            reasoning = (
+                f"Quick scan: closest {section} passage matches "
+                f"\"{texts[row]}\" (similarity {skill_similarity[i]:.2f})."
+            )
+            # The skill itself or an unambiguous alias ("rest" or "spark" alone proves nothing)
+            if any(
+                mentions(resume_lower, texts[r]) for r in rows
+                if r == rows[0] or texts[r] not in AMBIGUOUS_ALIASES
+            ):
+                score = max(score, self.quick_scan_mention_floor)
+                reasoning += " Mentioned explicitly."
+            scored[skill] = (score, reasoning)
+        return scored, skill_similarity
+
+    def _alias_matrix(self, model, texts):
+        """Unit vectors for the texts, embedding only ones not seen before."""
+        with _alias_lock:
+            missing = [t for t in dict.fromkeys(texts) if (model, t) not in _alias_vectors]
+        if missing:
+            vectors = np.asarray(self.embeddings.embed_documents(missing), dtype=np.float32)
+            vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+            with _alias_lock:
+                _alias_vectors.update(((model, t), v) for t, v in zip(missing, vectors))
+        with _alias_lock:
+            return np.stack([_alias_vectors[(model, t)] for t in texts])
+
+    def _chunk_matrix(self):
+        """(unit chunk vectors, their Documents) read back from the FAISS index."""
+        store = self.rag_vectorstore
+        try:
+            vectors = store.index.reconstruct_n(0, store.index.ntotal)
+            docs = [store.docstore.search(store.index_to_docstore_id[i])
+                    for i in range(store.index.ntotal)]
+        except Exception:  # index type without reconstruction: embed the chunks
+            docs = list(self.rag_chunks)
+            vectors = self.embeddings.embed_documents([d.page_content for d in docs])
+        vectors = np.asarray(vectors, dtype=np.float32)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True), docs
+
+    # ----------------------------------------------------------
+    #      INCREMENTAL RE-ANALYSIS (edited resume re-uploaded)
+    # ----------------------------------------------------------
+
+    def skill_evidence(self, skills, k=2):
+        """Chunk IDs each skill's score rests on.
+
+        Chunks naming the skill when there are any; otherwise (soft skills,
+        absent skills) the k chunks nearest to it by embedding.
+        """
+        chunk_terms = [set(tokenize(doc.page_content)) for doc in self.rag_chunks]
+        evidence = {}
+        for skill in skills:
+            terms = set(tokenize(skill)) - QUERY_STOPWORDS
+            evidence[skill] = {
+                doc.metadata.get("chunk_id")
+                for doc, doc_terms in zip(self.rag_chunks, chunk_terms)
+                if terms & doc_terms
+            }
+
+        unmatched = [skill for skill in skills if not evidence[skill]]
+        unseen = [skill for skill in unmatched if skill not in self._skill_vectors]
+        if unseen:
+            for skill, vector in zip(unseen, self.embeddings.embed_documents(unseen)):
+                self._skill_vectors[skill] = vector
+        for skill in unmatched:
+            evidence[skill] = {
+                doc.metadata.get("chunk_id")
+                for doc in self.rag_vectorstore.similarity_search_by_vector(
+                    self._skill_vectors[skill], k=k
+                )
+            }
+        return evidence
+
+    def _incremental_baseline(self, new_text):
+        """Previous analysis worth patching for this new text, else None.
+
+        Must run before the index is patched: the old evidence is read from it.
+        """
+        if not (self.rag_vectorstore and self.embeddings and self.rag_chunks
+                and self.analysis_result and self.extracted_skills):
+            return None
+        if self.analysis_result.get("scoring_mode") == "quick":
+            return None  # quick-scan scores are no baseline for LLM scores
+
+        chunks = ResumeTextSplitter(chunk_size=self.rag_chunk_size).split_documents(new_text)
+        new_ids = set(assign_chunk_ids(chunks))
+        old_ids = {doc.metadata.get("chunk_id") for doc in self.rag_chunks}
+        kept = len(new_ids & old_ids)
+        if kept < self.incremental_min_overlap * max(len(new_ids), len(old_ids)):
+            return None  # a different resume, not an edit
+
+        # Same text (only the JD/role changed): the per-skill cache covers it
+        same_text = text_hash(new_text) == self.resume_hash
+        return {
+            "chunks": chunks,
+            "same_text": same_text,
+            "result": self.analysis_result,
+            "weaknesses": self.resume_weaknesses,
+            "evidence": None if same_text else self.skill_evidence(self.extracted_skills),
+        }
+
+    def _rescore_changed(self, baseline, skills, report):
+        """Re-score only skills whose evidence changed; reuse everything else."""
+        old_scores = baseline["result"].get("skill_scores", {})
+        old_reasoning = baseline["result"].get("skill_reasoning", {})
+        new_evidence = self.skill_evidence(skills)
+        changed = [
+            skill for skill in skills
+            if skill not in old_scores
+            or baseline["evidence"].get(skill) != new_evidence[skill]
+        ]
+
+        # Seed the new resume's cache with everything the edit didn't touch
+        scores_cache, weakness_cache = self._skill_cache()
+        old_weaknesses = {skill_key(w.get("skill", "")): w for w in baseline["weaknesses"]}
+        for skill in skills:
+            key = skill_key(skill)
+            if skill not in changed:
+                scores_cache[key] = (old_scores[skill], old_reasoning.get(skill, ""))
+                if key in old_weaknesses:
+                    weakness_cache[key] = old_weaknesses[key]
+
+        report("scoring", 0.3)
+        scored, cascade, weaknesses = (
+            self.score_skills(self.resume_text, changed) if changed else ({}, None, {})
+        )
+        return self._assemble_analysis(skills, scored, cascade, report, weaknesses)
+
+    def _skill_cache(self):
+        """(scores, weaknesses) per-skill caches for the current resume."""
+        if self._skill_cache_hash != self.resume_hash:
+            self._skill_cache_hash = self.resume_hash
+            self._skill_scores_cache = {}
+            self._weakness_cache = {}
+        return self._skill_scores_cache, self._weakness_cache
+
+    def _assemble_analysis(self, skills, scored, cascade, report, fused_weaknesses=None):
+        """Build the result from fresh + cached per-skill scores.
+
+        Weaknesses are generated only for weak skills that were just scored
+        (and didn't get one from the fused scoring pass) or have no cached
+        entry; aggregates are always recomputed.
+        """
+        fused_weaknesses = fused_weaknesses or {}
+        scores_cache, weakness_cache = self._skill_cache()
+        scores_cache.update((skill_key(skill), value) for skill, value in scored.items())
+        weakness_cache.update(
+            (skill_key(skill), entry) for skill, entry in fused_weaknesses.items()
+        )
+        merged = {skill: scores_cache[skill_key(skill)] for skill in skills}
+        self.analysis_result = self.summarize_skill_scores(skills, merged, cascade)
+
+        # Weakness + examples: force weaknesses for low & medium scores
+        weak_skills = [skill for skill in skills if merged[skill][0] <= 6]
+        self.analysis_result["missing_skills"] = weak_skills
+        to_explain = [
+            skill for skill in weak_skills
+            if (skill in scored and skill not in fused_weaknesses)
+            or skill_key(skill) not in weakness_cache
+        ]
+
+        report("weaknesses", 0.8)
+        for weakness in self.analyze_resume_weaknesses(to_explain):
+            weakness_cache[skill_key(weakness.get("skill", ""))] = weakness
+        self.resume_weaknesses = [
+            dict(weakness_cache[skill_key(skill)], skill=skill, score=merged[skill][0])
+            for skill in weak_skills
+            if skill_key(skill) in weakness_cache
+        ]
+
+        # Set both keys so frontend can read
+        self.analysis_result["detailed_weaknesses"] = self.resume_weaknesses
+        self.analysis_result["detailed_weakness"] = self.resume_weaknesses
+        self.analysis_result["incremental"] = {
+            "rescored_skills": len(scored),
+            "reused_skills": len(skills) - len(scored),
+            "regenerated_weaknesses": len(to_explain),
+        }
+        return self.analysis_result
+
+    def _score_and_explain(self, skills, report):
+        """Skill scores + weaknesses; returns (analysis_result, weaknesses, strengths).
+
+        Skills already scored for this resume (e.g. under a previous JD) are
+        taken from the per-skill cache; only new skills are scored.
+        """
+        scores_cache, _ = self._skill_cache()
+        new_skills = [skill for skill in skills if skill_key(skill) not in scores_cache]
+        scored, cascade, weaknesses = (
+            self.score_skills(self.resume_text, new_skills) if new_skills else ({}, None, {})
+        )
+        self._assemble_analysis(skills, scored, cascade, report, weaknesses)
+        return self.analysis_result, self.resume_weaknesses, self.resume_strengths
+
+    def analyze_resume(self, resume_file, role_requirements=None, custom_jd=None,
+                       progress_callback=None, incremental=True, role_name=None,
+                       scoring_mode=None):
+        """Analyze a resume against role requirements or a custom JD
+
+        progress_callback(stage, fraction), if given, is called as each
+        pipeline stage starts (used by the job queue to report progress).
+        With `incremental`, an edited re-upload of the previous resume only
+        re-embeds changed chunks and re-scores skills whose evidence changed.
+        With a results_store, an analysis already stored for the same resume,
+        role/JD and model version is loaded instead of recomputed; role_name
+        is the label it is stored (and queried) under.
+        scoring_mode "quick" scores skills by embedding similarity only (no
+        LLM calls, no weaknesses); "deep" is the full LLM scoring. Defaults
+        to the agent's scoring_mode.
+        """
+        report = progress_callback or (lambda stage, fraction: None)
+        scoring_mode = scoring_mode or self.scoring_mode
+
+        # A new upload makes anything prefetched for the previous one moot
+        self.cancel_prefetch()
+
+        report("extracting", 0.0)
+        resume_text = self.extract_text_from_file(resume_file)
+        jd_text = self.extract_text_from_file(custom_jd) if custom_jd else None
+
+        store_key = None
+        if self.results_store is not None and resume_text:
+            store_key = (
+                text_hash(resume_text),
+                text_hash(jd_text) if custom_jd else text_hash(json.dumps(role_requirements or [])),
+                self.model_version(scoring_mode),
+            )
+            if self._load_stored_analysis(store_key):
+                report("done", 1.0)
+                return self.analysis_result
+
+        baseline = self._incremental_baseline(resume_text) if incremental else None
+        # Nothing from the previous analysis may leak into (or be stored as) this one
+        self.analysis_result = None
+        self.extracted_skills = None
+        self.resume_weaknesses = []
+        self.resume_strengths = []
+        self.resume_text = resume_text
+        self.resume_hash = text_hash(self.resume_text)
 
         with tempfile.NamedTemporaryFile(
             delete=False, suffix=".txt", mode="w", encoding="utf-8"
@@ -374,36 +1732,63 @@ For EACH skill return JSON:
             self.resume_file_path = tmp.name
 
         # FAISS vectorstore for Q&A
-        self.rag_vectorstore = self.create_rag_vector_store(self.resume_text)
+        report("indexing", 0.1)
+        if baseline:
+            self.patch_rag_vector_store(baseline["chunks"])
+        else:
+            self.rag_vectorstore = self.create_rag_vector_store(self.resume_text)
+        self.rag_retriever = HybridRetriever(self.rag_chunks, self.rag_vectorstore)
 
         if custom_jd:
-            self.jd_text = self.extract_text_from_file(custom_jd)
-            self.extracted_skills = self.extract_skills_from_jd(self.jd_text)
-            self.analysis_result = self.semantic_skill_analysis(
-                self.resume_text, self.extracted_skills
-            )
-
+            report("extracting_skills", 0.25)
+            self.jd_text = jd_text
+            # An unchanged JD (re-analysis, edited resume) keeps its skill list
+            jd_hash = text_hash(self.jd_text)
+            skills = self._jd_skills.get(jd_hash)
+            if skills is None:
+                skills = self.extract_skills_from_jd(self.jd_text)
+                if skills:  # a failed extraction ([]) is retried next time
+                    self._jd_skills[jd_hash] = skills
+                    while len(self._jd_skills) > 16:
+                        self._jd_skills.popitem(last=False)
+            self.extracted_skills = list(skills)
         elif role_requirements:
             self.extracted_skills = role_requirements
-            self.analysis_result = self.semantic_skill_analysis(
-                self.resume_text, role_requirements
-            )
 
-        # Weakness + examples
-        if self.analysis_result and "skill_scores" in self.analysis_result:
-            # Force weaknesses for low & medium scores
-            weak_skills = [
-                s for s, score in self.analysis_result["skill_scores"].items()
-                if score <= 6
-            ]
+        if not self.extracted_skills:
+            print("No skills to analyze the resume against")
+            report("done", 1.0)
+            return None
+
+        if scoring_mode == "quick":
+            report("scoring", 0.5)
+            self.analysis_result = self.quick_scan(self.extracted_skills)
+            self.resume_weaknesses = []
+        elif baseline and not baseline["same_text"]:
+            self._rescore_changed(baseline, self.extracted_skills, report)
+        else:
+            report("scoring", 0.35 if custom_jd else 0.3)
+            # Identical concurrent analyses (same key, resume, skills and settings) share one run
+            key = (
+                api_key_hash(self.api_key),
+                self.resume_hash,
+                text_hash(json.dumps(self.extracted_skills)),
+                self.model_version(scoring_mode),
+            )
+            shared = analysis_flight.do(
+                key, lambda: self._score_and_explain(self.extracted_skills, report)
+            )
+            # Copies: callers go on to mutate their own result
+            self.analysis_result, self.resume_weaknesses, self.resume_strengths = (
+                copy.deepcopy(shared)
+            )
 
-            self.analysis_result["missing_skills"] = weak_skills
-            self.analyze_resume_weaknesses()
+        if store_key and self._analysis_complete():
+            self._store_analysis(store_key, role_name, getattr(resume_file, "name", None))
 
-            # Set both keys so frontend can read
-            self.analysis_result["detailed_weaknesses"] = self.resume_weaknesses
-            self.analysis_result["detailed_weakness"] = self.resume_weaknesses
+        self._start_background_work()
 
+        report("done", 1.0)
         return self.analysis_result
         
         if not self.resume_weaknesses and self.analysis_result.get("missing_skills"):
@@ -424,28 +1809,323 @@ For EACH skill return JSON:
             self.analysis_result["detailed_weakness"] = self.resume_weaknesses
 
 
+    # ----------------------------------------------------------
+    #      STATE EXPORT / RESTORE (analysis run elsewhere)
+    # ----------------------------------------------------------
+
+    def model_version(self, scoring_mode="deep"):
+        """Everything besides resume and JD that changes the analysis result."""
+        if scoring_mode == "quick":
+            return "|".join([
+                f"v{self.analysis_version}",
+                "quick",
+                self.embedding_model,
+                f"cutoff={self.cutoff_score}",
+            ])
+        return "|".join([
+            f"v{self.analysis_version}",
+            model_registry.spec("scoring")["model"],
+            model_registry.spec("screening")["model"] if self.use_scoring_cascade else "-",
+            "fused" if self.fuse_weaknesses else "separate",
+            f"cutoff={self.cutoff_score}",
+        ])
+
+    def _analysis_complete(self):
+        """False for a degraded result (e.g. a failed weaknesses call) not worth storing."""
+        result = self.analysis_result
+        if not result or not result.get("skill_scores"):
+            return False
+        if result.get("scoring_mode") == "quick":
+            return True
+        explained = {skill_key(w.get("skill", "")) for w in self.resume_weaknesses}
+        return all(skill_key(skill) in explained for skill in result.get("missing_skills", []))
+
+    def _load_stored_analysis(self, store_key):
+        try:
+            state, index_bytes = self.results_store.get(*store_key)
+        except Exception as e:
+            print(f"Error reading stored analysis: {e}")
+            return False
+        if state is None:
+            return False
+        self.load_state(state, index_bytes)
+        return True
+
+    def _store_analysis(self, store_key, role_name=None, candidate=None):
+        try:
+            state, index_bytes = self.export_state()
+            self.results_store.save(
+                *store_key, state, index_bytes, role=role_name, candidate=candidate
+            )
+        except Exception as e:
+            print(f"Error storing analysis: {e}")
+
+    def export_state(self):
+        """JSON-serializable analysis state plus the serialized FAISS index."""
+        state = {
+            "resume_text": self.resume_text,
+            "jd_text": self.jd_text,
+            "extracted_skills": self.extracted_skills,
+            "analysis_result": self.analysis_result,
+            "resume_weaknesses": self.resume_weaknesses,
+            "resume_strengths": self.resume_strengths,
+        }
+        index_bytes = (
+            self.rag_vectorstore.serialize_to_bytes() if self.rag_vectorstore else None
+        )
+        return state, index_bytes
+
+    def load_state(self, state, index_bytes=None):
+        """Restore an analysis produced by export_state (e.g. in a worker process).
+
+        index_bytes must come from our own workers: FAISS deserialization
+        uses pickle. Without it the Q&A index is rebuilt from the text.
+        """
+        self.cancel_prefetch()
+        self.resume_text = state.get("resume_text")
+        self.resume_hash = text_hash(self.resume_text)
+        self.jd_text = state.get("jd_text")
+        self.extracted_skills = state.get("extracted_skills")
+        self.analysis_result = state.get("analysis_result")
+        self.resume_weaknesses = state.get("resume_weaknesses") or []
+        self.resume_strengths = state.get("resume_strengths") or []
+
+        if index_bytes:
+            from langchain_community.vectorstores import FAISS
+
+            self.rag_chunks = ResumeTextSplitter(chunk_size=self.rag_chunk_size).split_documents(self.resume_text)
+            assign_chunk_ids(self.rag_chunks)
+            self.embeddings = self._openai_embeddings()
+            self.answer_cache.embeddings = self.embeddings
+            self.rag_vectorstore = FAISS.deserialize_from_bytes(
+                index_bytes, self.embeddings, allow_dangerous_deserialization=True
+            )
+        elif self.resume_text:
+            self.rag_vectorstore = self.create_rag_vector_store(self.resume_text)
+        self.rag_retriever = HybridRetriever(self.rag_chunks, self.rag_vectorstore)
+
+        self._start_background_work()
+        return self.analysis_result
+
     def ask_question(self, question):
         """Ask a question about the resume (RAG-based Q&A)"""
         if not self.rag_vectorstore or not self.resume_text:
             return "Please analyze a resume first."
 
-        qa_chain = SimpleQA(api_key=self.api_key, vectorstore=self.rag_vectorstore)
-        response = qa_chain.run(question)
+        memory = self.conversations.setdefault(self.resume_hash, ConversationMemory())
+
+        # Follow-ups depend on the conversation, so only cache standalone questions
+        if memory.is_follow_up(question):
+            docs = memory.reusable_chunks(question, self.rag_retriever)
+            response, docs = self._answer_question(
+                question, history=memory.history_text(), docs=docs
+            )
+            memory.add_turn(question, response, docs)
+            return response
+
+        # Example questions may already be running in the background
+        pending = self._pending_answers.get(
+            (self.resume_hash, normalize_question(question))
+        )
+        if pending is not None:
+            # Keep the source chunks so a follow-up ("tell me more") can reuse them
+            response, docs = pending.result()
+            memory.add_turn(question, response, docs)
+            return response
+
+        cached = self.answer_cache.lookup(self.resume_hash, question)
+        if cached is not None:
+            response, docs = cached
+            memory.add_turn(question, response, docs)
+            return response
+
+        response, docs = self._answer_question(
+            question, docs=memory.reusable_chunks(question, self.rag_retriever)
+        )
+        self.answer_cache.put(self.resume_hash, question, response, docs)
+        memory.add_turn(question, response, docs)
         return response
 
+    def _answer_question(self, question, history="", docs=None):
+        """Answer one question; returns (answer, chunks used as context)."""
+        qa_chain = SimpleQA(
+            api_key=self.api_key,
+            vectorstore=self.rag_vectorstore,
+            retriever=self.rag_retriever,
+        )
+        answer = qa_chain.run(question, history=history, docs=docs)
+        return answer, qa_chain.last_docs
+
+    def precompute_answers(self, questions):
+        """Answer questions in the background so later clicks hit the cache."""
+        if not self.rag_vectorstore or not self.resume_text:
+            return
+
+        if self._background_executor is None:
+            self._background_executor = ThreadPoolExecutor(max_workers=3)
+
+        resume_hash = self.resume_hash
+        for question in questions:
+            key = (resume_hash, normalize_question(question))
+            if key in self._pending_answers:
+                continue
+            if self.answer_cache.get(resume_hash, question) is not None:
+                continue
+
+            def work(question=question):
+                answer, docs = self._answer_question(question)
+                self.answer_cache.put(resume_hash, question, answer, docs)
+                return answer, docs
+
+            future = self._background_executor.submit(work)
+            self._pending_answers[key] = future
+            future.add_done_callback(
+                lambda _, key=key: self._pending_answers.pop(key, None)
+            )
+
+    # ---- speculative prefetch ---- #
+
+    def _start_background_work(self):
+        """After an analysis: prefetch the other tabs, or at least the example answers."""
+        if not self.analysis_result:
+            return
+        if self.analysis_result.get("scoring_mode") == "quick":
+            return  # triage: don't spend on tabs most scanned resumes never open
+        if self.speculative_prefetch:
+            self.prefetch_downstream()
+        elif self.precompute_example_answers:
+            self.precompute_answers(EXAMPLE_QUESTIONS)
+
+    def prefetch_downstream(self):
+        """Speculatively generate what the other tabs show by default.
+
+        Queued in the background right after analysis, in priority order
+        (interview questions, improvements, example answers), for as long as
+        the estimated cost stays within prefetch_budget_usd. Results land in
+        the caches the tabs already read, so the first click is instant.
+        cancel_prefetch() drops whatever has not started yet.
+        """
+        if not self.analysis_result or not self.resume_text:
+            return
+
+        if self._background_executor is None:
+            self._background_executor = ThreadPoolExecutor(max_workers=3)
+
+        resume_tokens = estimate_tokens(self.resume_text)
+        profile_tokens = 700  # typical size of the JSON profile used as context
+        llm_areas = [
+            area for area in DEFAULT_IMPROVEMENT_AREAS
+            if not (area == "Skills Highlighting" and self.resume_weaknesses)
+            and (self.resume_hash, area, "") not in self._improvement_cache
+        ]
+
+        # The profile is shared context for both prompts; whichever runs first pays for it
+        profile_cost = 0.0
+        if self._profile_hash != self.resume_hash:
+            profile_cost = model_registry.estimate_cost(
+                "profile", resume_tokens + 300, profile_tokens
+            )
+        questions_cost = model_registry.estimate_cost(
+            "interview_questions", profile_tokens + 400, 60 * DEFAULT_INTERVIEW_COUNT
+        )
+        improvements_cost = len(llm_areas) * model_registry.estimate_cost(
+            "improvement", profile_tokens + 400, 450
+        )
+        answer_cost = model_registry.estimate_cost("qa", self.rag_chunk_size + 200, 150)
+
+        budget = self.prefetch_budget_usd
+        planned = {"interview_questions": False, "improvements": [], "answers": [],
+                   "estimated_cost_usd": 0.0, "budget_usd": budget}
+        spent = 0.0
+
+        if spent + profile_cost + questions_cost <= budget:
+            spent += profile_cost + questions_cost
+            profile_cost = 0.0
+            key = (self.resume_hash, tuple(DEFAULT_INTERVIEW_TYPES),
+                   DEFAULT_INTERVIEW_DIFFICULTY, DEFAULT_INTERVIEW_COUNT)
+            future = self._submit_prefetch(
+                self._generate_interview_questions,
+                DEFAULT_INTERVIEW_TYPES, DEFAULT_INTERVIEW_DIFFICULTY, DEFAULT_INTERVIEW_COUNT,
+            )
+            self._prefetched_questions = (key, future)
+            planned["interview_questions"] = True
+
+        if llm_areas and spent + profile_cost + improvements_cost <= budget:
+            spent += profile_cost + improvements_cost
+            self._submit_prefetch(self.improve_resume, DEFAULT_IMPROVEMENT_AREAS)
+            planned["improvements"] = llm_areas
+
+        affordable = int((budget - spent) // answer_cost) if answer_cost else len(EXAMPLE_QUESTIONS)
+        questions = EXAMPLE_QUESTIONS[:max(0, affordable)]
+        if questions and self.rag_vectorstore:
+            spent += len(questions) * answer_cost
+            self.precompute_answers(questions)
+            planned["answers"] = questions
+
+        planned["estimated_cost_usd"] = round(spent, 6)
+        self.prefetch_plan = planned
+
+    def _submit_prefetch(self, fn, *args):
+        generation = self._prefetch_generation
+        resume = self._resume_snapshot()
+
+        def work():
+            # Skip work whose resume was replaced while it sat in the queue
+            if generation != self._prefetch_generation:
+                return None
+            result = fn(*args, resume=resume)
+            # ... or while it ran: the result belongs to the old resume
+            if resume[0] != self.resume_hash:
+                return None
+            return result
+
+        future = self._background_executor.submit(work)
+        self._prefetch_futures.append(future)
+        return future
+
+    def cancel_prefetch(self):
+        """Drop queued speculative work (e.g. because a new resume was uploaded).
+
+        Calls already talking to the LLM finish, but they work on the resume
+        captured at submission, their cache writes are keyed by its hash and
+        their results are dropped, so nothing reaches the new resume.
+        """
+        self._prefetch_generation += 1
+        for future in self._prefetch_futures:
+            future.cancel()
+        for future in list(self._pending_answers.values()):
+            future.cancel()
+        self._prefetch_futures = []
+        self._prefetched_questions = None
+
     def generate_interview_questions(
         self, question_types, difficulty, num_questions
     ):
         """Generate interview questions based on the resume"""
-        if not self.resume_text or not self.extracted_skills:
+        # A prefetched set for these parameters is served once; asking
+        # again generates a fresh set as before
+        prefetched, self._prefetched_questions = self._prefetched_questions, None
+        key = (self.resume_hash, tuple(question_types), difficulty, num_questions)
+        if prefetched is not None and prefetched[0] == key:
+            try:
+                questions = prefetched[1].result()
+            except Exception:  # cancelled or failed: generate it now
+                questions = None
+            if questions:
+                return questions
+
+        return self._generate_interview_questions(question_types, difficulty, num_questions)
+
+    def _generate_interview_questions(self, question_types, difficulty, num_questions,
+                                      resume=None):
+        if not self._resume_snapshot(resume)[1] or not self.extracted_skills:
             return []
 
         try:
-            llm = ChatOpenAI(model="gpt-4o", api_key=self.api_key)
+            llm = model_registry.chat("interview_questions", self.api_key)
 
             context = f"""
-            Resume Content:
-            {self.resume_text[:2000]}...
+            {self.resume_context(max_chars=2000, resume=resume)}
 
             Skills to focus on: {', '.join(self.extracted_skills)}
             
@@ -465,56 +2145,18 @@ For EACH skill return JSON:
 
             {context}
 
-            Format the response as a list of tuples with the question type and the question itself.
-            Each tuple should be in the format: ("Question Type" , "Full Question Text")
+            Return JSON: {{"questions": [{{"type": "<one of the requested types>", "question": "Full Question Text"}}]}}
             """
 
-            response = llm.invoke(prompt)
-            questions_text = response.content
+            items = invoke_structured(llm, prompt, "interview_questions", "interview_questions")
 
             questions = []
-
-            pattern = r'[("]([^"]+)[",)\s]+[(",\s]+([^"]+)[")\s]+'
-            matches = re.findall(pattern, questions_text, re.DOTALL)
-
-            for match in matches:
-                if len(match) >= 2:
-                    question_type = match[0].strip()
-                    question = match[1].strip()
-
-                    for requested_type in question_types:
-                        if requested_type.lower() in question_type.lower():
-                            questions.append((requested_type, question))
-                            break
-
-            if not questions:
-                lines = questions_text.split("\n")
-                current_type = None
-                current_question = ""
-
-                for line in lines:
-                    line = line.strip()
-                    if (
-                        any(t.lower() in line.lower() for t in question_types)
-                        and not current_question
-                    ):
-                        current_type = next(
-                            (
-                                t
-                                for t in question_types
-                                if t.lower() in line.lower()
-                            ),
-                            None,
-                        )
-                        if ":" in line:
-                            current_question = line.split(":", 1)[1].strip()
-
-                    elif current_type and line:
-                        current_question += " " + line
-                    elif current_type and current_question:
-                        questions.append((current_type, current_question))
-                        current_type = None
-                        current_question = ""
+            for item in items:
+                question_type = item["type"].strip()
+                for requested_type in question_types:
+                    if requested_type.lower() in question_type.lower():
+                        questions.append((requested_type, item["question"].strip()))
+                        break
 
             questions = questions[:num_questions]
 
@@ -524,160 +2166,156 @@ For EACH skill return JSON:
             print(f"Error generating interview questions: {e}")
             return []
 
-    def improve_resume(self, improvement_areas, target_role=""):
-        """Generate suggestions to improve the resume"""
-        if not self.resume_text:
-            return {}
-
-        try:
-            improvements = {}
+    def improve_resume(self, improvement_areas, target_role="", on_area=None, resume=None):
+        """Generate suggestions to improve the resume
 
-            # Special handling for skills highlighting using weaknesses
-            if "Skills Highlighting" in improvement_areas and self.resume_weaknesses:
-                skill_improvements = {
-                    "description": "Your resume needs to better highlight key skills that are important for the role.",
-                    "specific": [],
-                }
-
-                before_after_examples = {}
-
-                for weakness in self.resume_weaknesses:
-                    skill_name = weakness.get("skill", "")
-                    if "suggestions" in weakness and weakness["suggestions"]:
-                        for suggestion in weakness["suggestions"]:
-                            skill_improvements["specific"].append(
-                                f"**{skill_name}**: {suggestion}"
-                            )
-
-                    if "example" in weakness and weakness["example"]:
-                        resume_chunks = self.resume_text.split("\n\n")
-                        relevant_chunk = ""
+        Each area is generated by its own small prompt, in parallel, and
+        cached by (resume hash, area, target role). on_area(area, improvement)
+        is called from this thread as each area becomes available, so callers
+        can show results progressively. Areas that fail are retried once and
+        never cached, so asking again only regenerates those. `resume` is a
+        snapshot from _resume_snapshot (background prefetch).
+        """
+        resume = self._resume_snapshot(resume)
+        resume_hash, resume_text = resume
+        if not resume_text:
+            return {}
 
-                        for chunk in resume_chunks:
-                            if skill_name.lower() in chunk.lower() or "experience" in chunk.lower():
-                                relevant_chunk = chunk
-                                break
+        improvements = {}
 
-                        if relevant_chunk:
-                            before_after_examples = {
-                                "before": relevant_chunk.strip(),
-                                "after": relevant_chunk.strip()
-                                + "\n"
-                                + weakness["example"],
-                            }
+        def publish(area, improvement):
+            improvements[area] = improvement
+            if on_area:
+                on_area(area, improvement)
 
-                if before_after_examples:
-                    skill_improvements["before_after"] = before_after_examples
+        # Special handling for skills highlighting using weaknesses
+        if "Skills Highlighting" in improvement_areas and self.resume_weaknesses:
+            publish("Skills Highlighting", self._skills_highlighting_improvement())
 
-                improvements["Skills Highlighting"] = skill_improvements
+        pending = []
+        for area in improvement_areas:
+            if area in improvements:
+                continue
+            cached = self._improvement_cache.get((resume_hash, area, target_role))
+            if cached is not None:
+                publish(area, copy.deepcopy(cached))
+            else:
+                pending.append(area)
+
+        for _ in range(2):  # first pass + one retry of failed areas
+            if not pending:
+                break
+            failed = []
+            with ThreadPoolExecutor(max_workers=min(4, len(pending))) as executor:
+                futures = {
+                    executor.submit(self._improve_area, area, target_role, resume): area
+                    for area in pending
+                }
+                for future in as_completed(futures):
+                    area = futures[future]
+                    try:
+                        improvement = future.result()
+                    except Exception as e:
+                        print(f"Error generating resume improvements for {area}: {e}")
+                        improvement = None
+                    if improvement is None:
+                        failed.append(area)
+                        continue
+                    self._improvement_cache[(resume_hash, area, target_role)] = improvement
+                    while len(self._improvement_cache) > 128:
+                        self._improvement_cache.popitem(last=False)
+                    publish(area, copy.deepcopy(improvement))
+            pending = failed
+
+        for area in pending:
+            publish(area, {
+                "description": f"Improvements needed in {area}",
+                "specific": ["Review and enhance this section"],
+            })
 
-            remaining_areas = [
-                area for area in improvement_areas if area not in improvements
-            ]
+        # Keep the requested order regardless of completion order
+        return {area: improvements[area] for area in improvement_areas if area in improvements}
 
-            if remaining_areas:
-                llm = ChatOpenAI(model="gpt-4o", api_key=self.api_key)
+    def _skills_highlighting_improvement(self):
+        """Skills Highlighting suggestions built from the weaknesses (no LLM call)."""
+        skill_improvements = {
+            "description": "Your resume needs to better highlight key skills that are important for the role.",
+            "specific": [],
+        }
 
-                weaknesses_text = ""
-                if self.resume_weaknesses:
-                    weaknesses_text = "Resume Weaknesses:\n"
-                    for i, weakness in enumerate(self.resume_weaknesses):
-                        weaknesses_text += (
-                            f"{i+1}. {weakness['skill']}: {weakness['detail']}\n"
-                        )
-                        if "suggestions" in weakness:
-                            for j, sugg in enumerate(weakness["suggestions"]):
-                                weaknesses_text += f"  - {sugg}\n"
+        before_after_examples = {}
 
-                context = f"""
-                Resume Content:
-                {self.resume_text}
+        for weakness in self.resume_weaknesses:
+            skill_name = weakness.get("skill", "")
+            if "suggestions" in weakness and weakness["suggestions"]:
+                for suggestion in weakness["suggestions"]:
+                    skill_improvements["specific"].append(
+                        f"**{skill_name}**: {suggestion}"
+                    )
 
-                Skills to focus on: {', '.join(self.extracted_skills)}
-                
-                Strengths: {', '.join(self.analysis_result.get('strengths', []))}
+            if "example" in weakness and weakness["example"]:
+                resume_chunks = self.resume_text.split("\n\n")
+                relevant_chunk = ""
+
+                for chunk in resume_chunks:
+                    if skill_name.lower() in chunk.lower() or "experience" in chunk.lower():
+                        relevant_chunk = chunk
+                        break
+
+                if relevant_chunk:
+                    before_after_examples = {
+                        "before": relevant_chunk.strip(),
+                        "after": relevant_chunk.strip()
+                        + "\n"
+                        + weakness["example"],
+                    }
 
-                Areas for improvement: {', '.join(self.analysis_result.get('missing_skills', []))}
+        if before_after_examples:
+            skill_improvements["before_after"] = before_after_examples
 
-                {weaknesses_text}
+        return skill_improvements
 
-                Target role: {target_role if target_role else "Not specified"}
-                """
-                prompt = f"""
-                Provide detailed suggestions to improve this resume in the following areas: {', '.join(remaining_areas)}.
+    def _improve_area(self, area, target_role="", resume=None):
+        """One focused improvement prompt for a single area; None on failure."""
+        llm = model_registry.chat("improvement", self.api_key)
 
-                {context}
+        weaknesses_text = ""
+        if self.resume_weaknesses:
+            weaknesses_text = "Resume Weaknesses:\n" + "".join(
+                f"- {weakness['skill']}: {weakness['detail']}\n"
+                for weakness in self.resume_weaknesses
+            )
 
-                For each improvement area, provide:
-                1. A general description of what needs improvement
-                2. 3-5 specific actionable suggestions
-                3. Where relevant, provide a before/after example
+        prompt = f"""
+        Provide detailed suggestions to improve the "{area}" of this resume.
 
-                Format the response as a JSON object with improvement areas as keys, each containing:
-                - "description" : general description
-                - "specific": list of specific suggestions
-                - "before_after": (where applicable) a dict with "before" and "after" examples
+        {self.resume_context(resume=resume)}
 
-                Only include the requested improvement areas that aren't already covered.
-                Focus particularly on addressing the resume weaknesses identified.
-                """
+        Strengths: {', '.join(self.analysis_result.get('strengths', []))}
+        Areas for improvement: {', '.join(self.analysis_result.get('missing_skills', []))}
+        {weaknesses_text}
+        Target role: {target_role if target_role else "Not specified"}
 
-                response = llm.invoke(prompt)
+        Provide:
+        1. A general description of what needs improvement in {area}
+        2. 3-5 specific actionable suggestions
+        3. Where relevant, a before/after example (otherwise empty strings)
 
-                ai_improvements = {}
+        Return JSON with exactly one entry: {{"areas": [{{"area": "{area}", "description": "...",
+        "specific": ["...", "..."], "before": "...", "after": "..."}}]}}
+        """
 
-                json_match = re.search(
-                    r"```(?:json)?\s*([\s\S]+?)\s*```", response.content
-                )
-                if json_match:
-                    try:
-                        ai_improvements = json.loads(json_match.group(1))
-                        improvements.update(ai_improvements)
-                    except json.JSONDecodeError:
-                        pass
-
-                if not ai_improvements:
-                    sections = response.content.split("##")
-
-                    for section in sections:
-                        if not section.strip():
-                            continue
-
-                        lines = section.strip().split("\n")
-                        area = None
-
-                        for line in lines:
-                            if not area and line.strip():
-                                area = line.strip()
-                                improvements[area] = {
-                                    "description": "",
-                                    "specific": [],
-                                }
-                            elif area and "specific" in improvements[area]:
-                                if line.strip().startswith("- "):
-                                    improvements[area]["specific"].append(
-                                        line.strip()[2:]
-                                    )
-                                elif not improvements[area]["description"]:
-                                    improvements[area]["description"] += line.strip()
-
-            for area in improvement_areas:
-                if area not in improvements:
-                    improvements[area] = {
-                        "description": f"Improvements needed in {area}",
-                        "specific": ["Review and enhance this section"],
-                    }
+        items = invoke_structured(
+            llm, prompt, "improvements", "improvement", repair_prompt=lambda items: None
+        )
+        if not items:
+            return None
 
-            return improvements
-        except Exception as e:
-            print(f"Error generating resume improvements: {e}")
-            return {
-                area: {
-                    "description": "Error generating suggestions",
-                    "specific": [],
-                }
-                for area in improvement_areas
-            }
+        item = items[0]
+        improvement = {"description": item["description"], "specific": item["specific"]}
+        if item["before"] or item["after"]:
+            improvement["before_after"] = {"before": item["before"], "after": item["after"]}
+        return improvement
 
     def get_improved_resume(self, target_role="", highlight_skills="", template_style="Classic"):
         """Generate an improved version of the resume optimized for the job description"""
@@ -793,9 +2431,7 @@ For EACH skill return JSON:
                             f"For {skill_name}: {weakness['example']}\n\n"
                         )
 
-            llm = ChatOpenAI(
-                model="gpt-4o", temperature=0.7, api_key=self.api_key
-            )
+            llm = model_registry.chat("rewrite", self.api_key)
 
             jd_context = ""
             if self.jd_text:
@@ -810,7 +2446,7 @@ For EACH skill return JSON:
             {TEMPLATES.get(template_style, TEMPLATES["Classic"])}
 
             {jd_context}
-            Original Resume:
+            Original Resume (keep every role, project, date, metric and contact detail it contains):
             {self.resume_text}
 
             Skills to highlight (in order of priority): {', '.join(skills_to_highlight)}
@@ -834,7 +2470,7 @@ For EACH skill return JSON:
             Format the resume in a modern, clean style with clear section headings.
             """
 
-            response = llm.invoke(prompt)
+            response = invoke_llm(llm, prompt, "rewrite")
             improved_resume = response.content.strip()
 
             with tempfile.NamedTemporaryFile(
@@ -850,27 +2486,20 @@ For EACH skill return JSON:
             return "Error generating improved resume. Please try again."
     
 
-    def generate_pdf_resume(self, text, template_style):
-        buffer = io.BytesIO()
-        c = canvas.Canvas(buffer, pagesize=letter)
-
-        y = 750
+    def generate_pdf_resume(self, text, template_style, out=None):
+        """Render the resume as a styled, word-wrapped PDF (into `out` if given)."""
+        from pdf_renderer import render_pdf
 
-        for line in text.split("\n"):
-            if y < 40:
-                c.showPage()
-                y = 750
-
-            c.drawString(40, y, line[:95])
-            y -= 15
-
-        c.save()
-        buffer.seek(0)
-        return buffer
+        return render_pdf(text, template_style, out)
 
 
     def cleanup(self):
         """Clean up temporary files"""
+        self.cancel_prefetch()
+        if self._background_executor is not None:
+            self._background_executor.shutdown(wait=False, cancel_futures=True)
+            self._background_executor = None
+
         try:
             if hasattr(self, "resume_file_path") and os.path.exists(
                 self.resume_file_path
@@ -0,0 +1,543 @@
+"""Headless JSON/HTTP API around ResumeAnalysisAgent.
+
+Run with:  python api_server.py --port 8080 --workers 4 --queue-size 64
+
+Every compute endpoint enqueues a job on a bounded work queue and answers
+202 with a job ID; poll GET /jobs/{id} or stream GET /jobs/{id}/events
+(server-sent events). Add ?wait=true to block until the job is done.
+The OpenAI key is passed per request in the X-OpenAI-Key header (or
+Authorization: Bearer ...) and is never stored with the job.
+
+Follow-up calls (ask, interview-questions, improve, rewrite) take the
+analysis_id returned by /analyze; that agent lives in this process, so
+route follow-ups for one analysis to the same worker (sticky sessions).
+
+GET /healthz is the liveness probe; GET /readyz answers 503 until the
+process has warmed up (see warmup.py), so point the load balancer's
+readiness check at it.
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from aiohttp import web
+
+from agents import ResumeAnalysisAgent, cascade_stats
+from models import model_registry
+from structured import parse_stats
+from reports import export_reports_zip
+from results_store import ResultsStore
+from roles import ROLE_REQUIREMENTS
+from warmup import warmup
+
+
+class UploadedBytes(io.BytesIO):
+    """In-memory upload with a .name, as the agent's extractors expect."""
+
+    def __init__(self, data, name):
+        super().__init__(data)
+        self.name = name
+
+
+class Job:
+    def __init__(self, kind, analysis_id=None):
+        self.job_id = uuid.uuid4().hex
+        self.kind = kind
+        self.analysis_id = analysis_id
+        self.status = "queued"  # queued | running | done | failed
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+        self.done = asyncio.Event()
+        self.changed = asyncio.Event()
+
+    def to_dict(self):
+        return {
+            "job_id": self.job_id,
+            "kind": self.kind,
+            "analysis_id": self.analysis_id,
+            "status": self.status,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class ResumeService:
+    """Bounded job queue + async workers running agent calls on a thread pool."""
+
+    def __init__(self, workers=4, queue_size=64, max_sessions=256, job_ttl=3600,
+                 results_store=None):
+        self.workers = workers
+        self.results_store = results_store
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.jobs = {}
+        self.job_ttl = job_ttl
+        self.max_sessions = max_sessions
+        self.sessions = OrderedDict()  # analysis_id -> (agent, threading.Lock)
+        self._worker_tasks = []
+
+    async def start(self, app=None):
+        self._worker_tasks = [
+            asyncio.create_task(self._worker()) for _ in range(self.workers)
+        ]
+
+    async def stop(self, app=None):
+        for task in self._worker_tasks:
+            task.cancel()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        for agent, _ in self.sessions.values():
+            agent.cleanup()
+
+    # ---- sessions ---- #
+
+    def new_session(self, api_key):
+        analysis_id = uuid.uuid4().hex
+        # API clients pick their own questions; don't spend tokens on the UI's examples
+        agent = ResumeAnalysisAgent(
+            api_key=api_key,
+            precompute_example_answers=False,
+            results_store=self.results_store,
+        )
+        self.sessions[analysis_id] = (agent, threading.Lock())
+        while len(self.sessions) > self.max_sessions:
+            _, (old_agent, _) = self.sessions.popitem(last=False)
+            old_agent.cleanup()
+        return analysis_id
+
+    def drop_session(self, analysis_id):
+        session = self.sessions.pop(analysis_id, None)
+        if session is not None:
+            session[0].cleanup()
+
+    def get_session(self, analysis_id):
+        session = self.sessions.get(analysis_id)
+        if session is None:
+            raise web.HTTPNotFound(
+                text=json.dumps({"error": "Unknown analysis_id"}),
+                content_type="application/json",
+            )
+        self.sessions.move_to_end(analysis_id)
+        return session
+
+    # ---- jobs ---- #
+
+    def _prune_jobs(self):
+        cutoff = time.time() - self.job_ttl
+        for job_id in [
+            j.job_id for j in self.jobs.values()
+            if j.finished_at and j.finished_at < cutoff
+        ]:
+            del self.jobs[job_id]
+
+    def submit(self, kind, analysis_id, api_key, func):
+        """Queue func(agent) for a session; 503 when the queue is full."""
+        self._prune_jobs()
+        job = Job(kind, analysis_id)
+        try:
+            self.queue.put_nowait((job, api_key, func))
+        except asyncio.QueueFull:
+            raise web.HTTPServiceUnavailable(
+                text=json.dumps({"error": "Work queue is full, retry later"}),
+                content_type="application/json",
+                headers={"Retry-After": "5"},
+            )
+        self.jobs[job.job_id] = job
+        return job
+
+    async def _worker(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            job, api_key, func = await self.queue.get()
+            job.status = "running"
+            job.changed.set()
+            try:
+                agent, lock = self.get_session(job.analysis_id)
+                job.result = await loop.run_in_executor(
+                    self.executor, self._run_locked, agent, lock, api_key, func
+                )
+                job.status = "done"
+            except Exception as e:
+                job.status = "failed"
+                job.error = str(e)
+            finally:
+                job.finished_at = time.time()
+                job.done.set()
+                job.changed.set()
+                self.queue.task_done()
+
+    @staticmethod
+    def _run_locked(agent, lock, api_key, func):
+        # One job at a time per analysis; the key is per request, not per agent
+        with lock:
+            agent.set_api_key(api_key)
+            return func(agent)
+
+
+# -------------------- HTTP handlers -------------------- #
+
+routes = web.RouteTableDef()
+
+
+def require_api_key(request):
+    api_key = request.headers.get("X-OpenAI-Key", "")
+    auth = request.headers.get("Authorization", "")
+    if not api_key and auth.lower().startswith("bearer "):
+        api_key = auth[7:].strip()
+    if not api_key:
+        raise web.HTTPUnauthorized(
+            text=json.dumps({"error": "Pass the OpenAI API key in X-OpenAI-Key"}),
+            content_type="application/json",
+        )
+    return api_key
+
+
+def bad_request(message):
+    return web.HTTPBadRequest(
+        text=json.dumps({"error": message}), content_type="application/json"
+    )
+
+
+async def job_response(request, job):
+    if request.query.get("wait", "").lower() in ("1", "true", "yes"):
+        await job.done.wait()
+        return web.json_response(job.to_dict())
+    return web.json_response(
+        job.to_dict(), status=202, headers={"Location": f"/jobs/{job.job_id}"}
+    )
+
+
+@routes.post("/analyze")
+async def analyze(request):
+    """multipart/form-data: resume (file) + role | skills | jd (file) | jd_text.
+
+    Optional role_name labels the result in the results store (defaults to role);
+    mode=quick scores skills by embedding similarity only (default: deep).
+    """
+    api_key = require_api_key(request)
+    service = request.app["service"]
+    form = await request.post()
+
+    resume = form.get("resume")
+    if resume is None or not hasattr(resume, "file"):
+        raise bad_request("Upload the resume as the 'resume' file field")
+    resume_file = UploadedBytes(resume.file.read(), resume.filename or "resume.pdf")
+
+    custom_jd = None
+    role_requirements = None
+    role_name = form.get("role_name")  # label the stored result is queried by
+    jd = form.get("jd")
+    if jd is not None and hasattr(jd, "file"):
+        custom_jd = UploadedBytes(jd.file.read(), jd.filename or "jd.txt")
+    elif form.get("jd_text"):
+        custom_jd = UploadedBytes(form["jd_text"].encode("utf-8"), "jd.txt")
+    elif form.get("skills"):
+        raw = form["skills"]
+        try:
+            role_requirements = json.loads(raw)
+        except ValueError:
+            role_requirements = [s.strip() for s in raw.split(",") if s.strip()]
+    elif form.get("role") in ROLE_REQUIREMENTS:
+        role_requirements = ROLE_REQUIREMENTS[form["role"]]
+        role_name = role_name or form["role"]
+    else:
+        raise bad_request(
+            f"Pass one of: jd, jd_text, skills, or role in {sorted(ROLE_REQUIREMENTS)}"
+        )
+
+    scoring_mode = form.get("mode", "deep")
+    if scoring_mode not in ("deep", "quick"):
+        raise bad_request("mode must be 'deep' or 'quick'")
+
+    analysis_id = service.new_session(api_key)
+    try:
+        job = service.submit(
+            "analyze",
+            analysis_id,
+            api_key,
+            lambda agent: agent.analyze_resume(
+                resume_file, role_requirements=role_requirements, custom_jd=custom_jd,
+                role_name=role_name, scoring_mode=scoring_mode,
+            ),
+        )
+    except web.HTTPServiceUnavailable:
+        service.drop_session(analysis_id)
+        raise
+    return await job_response(request, job)
+
+
+async def json_body(request, *required):
+    try:
+        body = await request.json()
+    except ValueError:
+        raise bad_request("Body must be JSON")
+    if not isinstance(body, dict):
+        raise bad_request("Body must be a JSON object")
+    missing = [key for key in required if not body.get(key)]
+    if missing:
+        raise bad_request(f"Missing fields: {', '.join(missing)}")
+    return body
+
+
+@routes.post("/ask")
+async def ask(request):
+    api_key = require_api_key(request)
+    body = await json_body(request, "analysis_id", "question")
+    service = request.app["service"]
+    service.get_session(body["analysis_id"])
+    job = service.submit(
+        "ask", body["analysis_id"], api_key,
+        lambda agent: agent.ask_question(body["question"]),
+    )
+    return await job_response(request, job)
+
+
+@routes.post("/interview-questions")
+async def interview_questions(request):
+    api_key = require_api_key(request)
+    body = await json_body(request, "analysis_id")
+    try:
+        num_questions = int(body.get("num_questions", 5))
+    except (TypeError, ValueError):
+        raise bad_request("num_questions must be an integer")
+    if not 1 <= num_questions <= 20:
+        raise bad_request("num_questions must be between 1 and 20")
+    question_types = body.get("question_types", ["Basic", "Technical"])
+    if not isinstance(question_types, list) or not all(isinstance(t, str) for t in question_types):
+        raise bad_request("question_types must be a list of strings")
+    service = request.app["service"]
+    service.get_session(body["analysis_id"])
+    job = service.submit(
+        "interview-questions", body["analysis_id"], api_key,
+        lambda agent: agent.generate_interview_questions(
+            question_types,
+            body.get("difficulty", "Medium"),
+            num_questions,
+        ),
+    )
+    return await job_response(request, job)
+
+
+@routes.post("/improve")
+async def improve(request):
+    api_key = require_api_key(request)
+    body = await json_body(request, "analysis_id")
+    service = request.app["service"]
+    service.get_session(body["analysis_id"])
+    job = service.submit(
+        "improve", body["analysis_id"], api_key,
+        lambda agent: agent.improve_resume(
+            body.get("areas", ["Content", "Skills Highlighting"]),
+            body.get("target_role", ""),
+        ),
+    )
+    return await job_response(request, job)
+
+
+@routes.post("/rewrite")
+async def rewrite(request):
+    api_key = require_api_key(request)
+    body = await json_body(request, "analysis_id")
+    service = request.app["service"]
+    service.get_session(body["analysis_id"])
+    job = service.submit(
+        "rewrite", body["analysis_id"], api_key,
+        lambda agent: agent.get_improved_resume(
+            body.get("target_role", ""),
+            body.get("highlight_skills", ""),
+            body.get("template_style", "Classic"),
+        ),
+    )
+    return await job_response(request, job)
+
+
+def get_job(request):
+    job = request.app["service"].jobs.get(request.match_info["job_id"])
+    if job is None:
+        raise web.HTTPNotFound(
+            text=json.dumps({"error": "Unknown job_id"}),
+            content_type="application/json",
+        )
+    return job
+
+
+@routes.get("/jobs/{job_id}")
+async def job_status(request):
+    return web.json_response(get_job(request).to_dict())
+
+
+@routes.get("/jobs/{job_id}/events")
+async def job_events(request):
+    """Server-sent events: one event per status change until the job ends."""
+    job = get_job(request)
+    response = web.StreamResponse(headers={
+        "Content-Type": "text/event-stream",
+        "Cache-Control": "no-cache",
+    })
+    await response.prepare(request)
+
+    while True:
+        job.changed.clear()
+        await response.write(f"data: {json.dumps(job.to_dict())}\n\n".encode("utf-8"))
+        if job.done.is_set():
+            break
+        await job.changed.wait()
+
+    await response.write_eof()
+    return response
+
+
+@routes.get("/healthz")
+async def healthz(request):
+    service = request.app["service"]
+    return web.json_response({
+        "status": "ok",
+        "queued": service.queue.qsize(),
+        "queue_capacity": service.queue.maxsize,
+        "sessions": len(service.sessions),
+        "scoring_cascade": cascade_stats.snapshot(),
+        "structured_outputs": parse_stats.snapshot(),
+    })
+
+
+@routes.get("/readyz")
+async def readyz(request):
+    """Readiness: 200 once warm-up has finished, 503 before."""
+    status = warmup.status()
+    return web.json_response(status, status=200 if status["ready"] else 503)
+
+
+def find_candidates(request, default_limit=100):
+    """Run the results-store query described by the request's query string."""
+    store = request.app["service"].results_store
+    if store is None:
+        raise web.HTTPNotFound(
+            text=json.dumps({"error": "No results store configured (--results-db)"}),
+            content_type="application/json",
+        )
+    query = request.query
+    scoring_mode = query.get("mode", "deep")
+    if scoring_mode not in ("deep", "quick", "all"):
+        raise bad_request("mode must be 'deep', 'quick' or 'all'")
+    try:
+        return store.find(
+            role=query.get("role"),
+            min_score=int(query["min_score"]) if "min_score" in query else None,
+            max_score=int(query["max_score"]) if "max_score" in query else None,
+            lacking=query.getall("lacking", []),
+            having=query.getall("having", []),
+            scoring_mode=None if scoring_mode == "all" else scoring_mode,
+            limit=int(query.get("limit", default_limit)),
+        )
+    except ValueError:
+        raise bad_request("min_score, max_score and limit must be integers")
+
+
+@routes.get("/candidates")
+async def candidates(request):
+    """Query stored analyses: ?role=&min_score=&max_score=&lacking=&having=&mode=&limit=
+
+    lacking / having may repeat, e.g. ?role=Data Engineer&min_score=75&lacking=Airflow
+    mode is deep (default), quick or all.
+    """
+    return web.json_response({"candidates": find_candidates(request)})
+
+
+@routes.get("/candidates/export")
+async def export_candidates(request):
+    """Zip of report files for the candidates /candidates would list.
+
+    Same filters as /candidates (limit defaults to 500), plus format=pdf|txt|md
+    (may repeat; default all three).
+    """
+    formats = request.query.getall("format", ["pdf", "txt", "md"])
+    if not set(formats) <= {"pdf", "txt", "md"}:
+        raise bad_request("format must be pdf, txt or md")
+    rows = find_candidates(request, default_limit=500)
+    store = request.app["service"].results_store
+
+    def stored_candidates():
+        for row in rows:
+            state, _ = store.load(row["analysis_id"])
+            if state is not None:
+                yield {"name": row["candidate"], "analysis_result": state.get("analysis_result")}
+
+    def build_zip():
+        # Threads, not processes: forking this multi-threaded server is unsafe
+        buffer = tempfile.SpooledTemporaryFile(max_size=32 * 1024 * 1024)
+        export_reports_zip(stored_candidates(), buffer, formats, use_processes=False)
+        buffer.seek(0)
+        return buffer
+
+    buffer = await asyncio.get_running_loop().run_in_executor(None, build_zip)
+    response = web.StreamResponse(headers={
+        "Content-Type": "application/zip",
+        "Content-Disposition": 'attachment; filename="candidate_reports.zip"',
+    })
+    await response.prepare(request)
+    try:
+        while chunk := buffer.read(256 * 1024):
+            await response.write(chunk)
+    finally:
+        buffer.close()
+    await response.write_eof()
+    return response
+
+
+@routes.get("/models")
+async def models(request):
+    """Per-task model routes with their latency, token and cost stats."""
+    return web.json_response(model_registry.stats())
+
+
+async def start_warmup(app):
+    warmup.start()
+
+
+def create_app(workers=4, queue_size=64, warm_up=True, results_db=None):
+    app = web.Application(client_max_size=20 * 1024 * 1024)
+    service = ResumeService(
+        workers=workers,
+        queue_size=queue_size,
+        results_store=ResultsStore(results_db) if results_db else None,
+    )
+    app["service"] = service
+    app.add_routes(routes)
+    app.on_startup.append(service.start)
+    if warm_up:
+        app.on_startup.append(start_warmup)
+    else:
+        warmup.ready.set()
+    app.on_cleanup.append(service.stop)
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Resume analysis HTTP API")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--queue-size", type=int, default=64)
+    parser.add_argument("--results-db", default=os.environ.get("RESUME_RESULTS_DB"),
+                        help="SQLite file of stored analyses to reuse and query")
+    parser.add_argument("--no-warmup", action="store_true",
+                        help="report ready immediately instead of warming up first")
+    args = parser.parse_args()
+
+    web.run_app(
+        create_app(workers=args.workers, queue_size=args.queue_size,
+                   warm_up=not args.no_warmup, results_db=args.results_db),
+        host=args.host,
+        port=args.port,
+    )
@@ -1,73 +1,11 @@
 import streamlit as st
 import atexit
+import os
 
 from agents import ResumeAnalysisAgent
 import b_backend
-
-# ----------------- ROLE REQUIREMENTS -----------------
-
-ROLE_REQUIREMENTS = {
-    "AI/ML Engineer": [
-        "Python", "PyTorch", "TensorFlow", "Machine Learning", "Deep Learning", "MLOps",
-        "Scikit-Learn", "NLP", "Computer Vision", "Reinforcement Learning", "Hugging Face",
-        "Data Engineering", "Feature Engineering", "AutoML"
-    ],
-
-    "Frontend Engineer": [
-        "React", "Vue", "Angular", "HTML5", "CSS3", "Javascript", "Typescript", "Next.js",
-        "Svelte", "Bootstrap", "Tailwind CSS", "GraphQL", "Redux", "WebAssembly", "Three.js",
-        "Performance Optimization"
-    ],
-
-    "Backend Engineer": [
-        "Python", "Java", "Node.js", "REST APIs", "Cloud services", "Kubernetes", "Docker",
-        "GraphQL", "Microservices", "gRPC", "Spring Boot", "Flask", "FastAPI",
-        "SQL & NoSQL Databases", "Redis", "RabbitMQ", "CI/CD"
-    ],
-
-    "Data Engineer": [
-        "Python", "SQL", "Apache Spark", "Hadoop", "Kafka", "ETL Pipelines", "Airflow",
-        "BigQuery", "Redshift", "Data Warehousing", "Snowflake", "Azure Data Factory",
-        "GCP", "AWS Glue", "DBT"
-    ],
-
-    "DevOps Engineer": [
-        "Kubernetes", "Docker", "Terraform", "CI/CD", "AWS", "Azure", "GCP", "Jenkins",
-        "Ansible", "Promethus", "Grafana", "Helm", "Linux Administration",
-        "Networking", "Site Reliability Engineering (SRE)"
-    ],
-
-    "Full Stack Developer": [
-        "JavaScript", "TypeScript", "React", "Node.js", "Express", "MongoDB", "SQL", "HTML5",
-        "CSS3", "RESTful APIs", "Git", "CI/CD", "Cloud Services", "Responsive Design",
-        "Authentication & Authorization"
-    ],
-
-    "Product Manager": [
-        "Product Strategy", "User Research", "Agile Methodologies", "Roadmapping",
-        "Market Analysis", "Stakeholder Management", "Data Analysis", "User Stories",
-        "Product Lifecycle", "A/B Testing", "KPI Definition", "Prioritization",
-        "Competitive Analysis", "Customer Journey Mapping"
-    ],
-
-    "Data Scientist": [
-        "Python", "R", "SQL", "Machine Learning", "Statistics", "Data Visualization",
-        "Pandas", "Numpy", "Scikit-learn", "Jupyter", "Hypothesis Testing",
-        "Experimental Design", "Feature Engineering", "Model Evaluation"
-    ],
-
-    "Data Analyst": [
-    "Python", "SQL", "R", "Data Analysis", "Data Cleaning", "Data Wrangling",
-    "Data Visualization", "Tableau", "Power BI", "Excel", "Advanced Excel",
-    "Pivot Tables", "Dashboards", "Statistics", "Hypothesis Testing",
-    "A/B Testing", "Regression Analysis", "Time Series Analysis",
-    "Pandas", "NumPy", "Jupyter", "Business Intelligence",
-    "ETL", "Data Warehousing", "SQL Optimization",
-    "Stakeholder Communication", "Data Storytelling"
-    ]
-
-
-}
+from downloads import content_key
+from roles import ROLE_REQUIREMENTS
 
 # ------------------ STREAMLIT INIT ------------------
 
@@ -85,6 +23,33 @@ if 'resume_analyzed' not in st.session_state:
 if 'analysis_result' not in st.session_state:
     st.session_state.analysis_result = None
 
+if 'analysis_hash' not in st.session_state:
+    st.session_state.analysis_hash = None
+
+if 'analysis_job_id' not in st.session_state:
+    st.session_state.analysis_job_id = None
+
+# Set RESUME_JOB_DB to hand analyses to `python job_queue.py` workers
+# instead of running them inside the Streamlit process.
+JOB_DB = os.environ.get("RESUME_JOB_DB")
+job_queue = None
+if JOB_DB:
+    from job_queue import JobQueue
+    job_queue = JobQueue(JOB_DB)
+
+# Finished analyses are kept in this SQLite file and reused for the same
+# resume + role/JD + models (RESUME_RESULTS_DB= with no value turns it off)
+RESULTS_DB = os.environ.get("RESUME_RESULTS_DB", "results.sqlite3")
+results_store = None
+if RESULTS_DB:
+    from results_store import ResultsStore
+    results_store = ResultsStore(RESULTS_DB)
+
+# Opt-in (RESUME_PREFETCH=1): after an analysis, generate the default interview
+# questions, improvements and example answers in the background. Off by
+# default since it spends API budget on tabs the user may never open.
+PREFETCH = os.environ.get("RESUME_PREFETCH", "0") == "1"
+
 
 # ----------------- AGENT SETUP -----------------
 
@@ -95,10 +60,13 @@ def setup_agent(config):
 
     if st.session_state.resume_agent is None:
         st.session_state.resume_agent = ResumeAnalysisAgent(
-            api_key=config["openai_api_key"]
+            api_key=config["openai_api_key"],
+            speculative_prefetch=PREFETCH,
+            results_store=results_store,
         )
     else:
-        st.session_state.resume_agent.api_key = config["openai_api_key"]
+        st.session_state.resume_agent.set_api_key(config["openai_api_key"])
+    st.session_state.resume_agent.scoring_mode = config["scoring_mode"]
 
     return st.session_state.resume_agent
 
@@ -110,18 +78,69 @@ def analyze_resume(agent, resume_file, role, custom_jd):
 
     with st.spinner("Analyzing resume..."):
         if custom_jd:
-            result = agent.analyze_resume(resume_file, custom_jd=custom_jd)
+            result = agent.analyze_resume(
+                resume_file, custom_jd=custom_jd, role_name=f"JD: {custom_jd.name}"
+            )
         else:
             result = agent.analyze_resume(
                 resume_file,
-                role_requirements=ROLE_REQUIREMENTS[role]
+                role_requirements=ROLE_REQUIREMENTS[role],
+                role_name=role,
             )
 
         st.session_state.resume_analyzed = True
         st.session_state.analysis_result = result
+        # Hash once here; the results view caches its derived blocks by it
+        st.session_state.analysis_hash = content_key(result)
         return result
 
 
+def submit_analysis_job(agent, resume_file, role, custom_jd):
+    if not resume_file:
+        st.error("Please upload a resume.")
+        return None
+
+    st.session_state.analysis_job_id = job_queue.submit(
+        resume_file.getvalue(),
+        resume_file.name,
+        agent.api_key,
+        role_requirements=None if custom_jd else ROLE_REQUIREMENTS[role],
+        jd_bytes=custom_jd.getvalue() if custom_jd else None,
+        jd_name=custom_jd.name if custom_jd else None,
+        role_name=f"JD: {custom_jd.name}" if custom_jd else role,
+        scoring_mode=agent.scoring_mode,
+        model_version=agent.model_version(agent.scoring_mode),
+    )
+    return st.session_state.analysis_job_id
+
+
+@st.fragment(run_every=1)
+def analysis_job_progress(agent):
+    job_id = st.session_state.analysis_job_id
+    if not job_id:
+        return
+
+    status = job_queue.status(job_id)
+    if status is None:
+        st.session_state.analysis_job_id = None
+        return
+
+    if status["status"] == "failed":
+        st.error(f"Analysis failed: {status['error']}")
+        st.session_state.analysis_job_id = None
+    elif status["status"] == "done":
+        state, index_bytes = job_queue.result(job_id)
+        agent.load_state(state, index_bytes)
+        st.session_state.analysis_job_id = None
+        st.session_state.resume_analyzed = True
+        st.session_state.analysis_result = agent.analysis_result
+        st.session_state.analysis_hash = content_key(agent.analysis_result)
+        st.rerun()
+    else:
+        stage = (status["stage"] or status["status"]).replace("_", " ")
+        st.progress(status["progress"] or 0.0, text=f"Analyzing resume: {stage}...")
+
+
 def ask_question(agent, question):
     with st.spinner("Thinking..."):
         return agent.ask_question(question)
@@ -132,9 +151,9 @@ def generate_interview_questions(agent, types, difficulty, num):
         return agent.generate_interview_questions(types, difficulty, num)
 
 
-def improve_resume(agent, areas, role):
+def improve_resume(agent, areas, role, on_area=None):
     with st.spinner("Generating improvements..."):
-        return agent.improve_resume(areas, role)
+        return agent.improve_resume(areas, role, on_area=on_area)
 
 
 def get_improved_resume(agent, role, skills,template):
@@ -150,6 +169,79 @@ def cleanup():
 atexit.register(cleanup)
 
 
+# ---------------------- TABS ----------------------
+# Each tab is a fragment: a widget interaction inside one tab reruns only
+# that tab, not the whole page (and not the heavy analysis view).
+
+@st.fragment
+def analysis_tab(agent):
+    role, custom_jd = b_backend.role_selection_section(ROLE_REQUIREMENTS)
+    uploaded_resume = b_backend.resume_upload_section()
+
+    if st.button("Analyze Resume", type="primary"):
+        if agent and uploaded_resume and job_queue is not None:
+            submit_analysis_job(agent, uploaded_resume, role, custom_jd)
+        elif agent and uploaded_resume:
+            analyze_resume(agent, uploaded_resume, role, custom_jd)
+            # The other tabs depend on the new result: rerun the full page
+            st.rerun()
+
+    if job_queue is not None and agent:
+        analysis_job_progress(agent)
+
+    if st.session_state.analysis_result:
+        b_backend.display_analysis_results(
+            st.session_state.analysis_result,
+            st.session_state.analysis_hash,
+        )
+
+
+@st.fragment
+def qa_tab(agent):
+    if st.session_state.resume_analyzed:
+        b_backend.resume_qa_section(
+            True,
+            ask_question_func=lambda q: ask_question(agent, q)
+        )
+    else:
+        st.warning("Please analyze a resume first.")
+
+
+@st.fragment
+def interview_tab(agent):
+    if st.session_state.resume_analyzed:
+        b_backend.interview_questions_section(
+            True,
+            generate_questions_func=lambda t, d, n:
+            generate_interview_questions(agent, t, d, n)
+        )
+    else:
+        st.warning("Please analyze a resume first.")
+
+
+@st.fragment
+def improvement_tab(agent):
+    if st.session_state.resume_analyzed:
+        b_backend.resume_improvement_section(
+            True,
+            improve_resume_func=lambda a, r, on_area=None: improve_resume(agent, a, r, on_area)
+        )
+    else:
+        st.warning("Please analyze a resume first.")
+
+
+@st.fragment
+def improved_resume_tab(agent):
+    if st.session_state.resume_analyzed:
+        b_backend.improved_resume_section(
+            True,
+            get_improved_resume_func=lambda r, s, template:
+            get_improved_resume(agent, r, s, template)
+        )
+    else:
+        st.warning("Please analyze a resume first.")
+
+
 # ---------------------- MAIN APP ----------------------
 
 def main():
@@ -163,57 +255,23 @@ def main():
 
     # ---------------- TAB 1: Resume Analysis ----------------
     with tabs[0]:
-        role, custom_jd = b_backend.role_selection_section(ROLE_REQUIREMENTS)
-        uploaded_resume = b_backend.resume_upload_section()
-
-        if st.button("Analyze Resume", type="primary"):
-            if agent and uploaded_resume:
-                analyze_resume(agent, uploaded_resume, role, custom_jd)
-
-        if st.session_state.analysis_result:
-            b_backend.display_analysis_results(st.session_state.analysis_result)
+        analysis_tab(agent)
 
     # ---------------- TAB 2: Resume Q&A ----------------
     with tabs[1]:
-        if st.session_state.resume_analyzed:
-            b_backend.resume_qa_section(
-                True,
-                ask_question_func=lambda q: ask_question(agent, q)
-            )
-        else:
-            st.warning("Please analyze a resume first.")
+        qa_tab(agent)
 
     # ---------------- TAB 3: Interview Questions ----------------
     with tabs[2]:
-        if st.session_state.resume_analyzed:
-            b_backend.interview_questions_section(
-                True,
-                generate_questions_func=lambda t, d, n:
-                generate_interview_questions(agent, t, d, n)
-            )
-        else:
-            st.warning("Please analyze a resume first.")
+        interview_tab(agent)
 
     # ---------------- TAB 4: Resume Improvements ----------------
     with tabs[3]:
-        if st.session_state.resume_analyzed:
-            b_backend.resume_improvement_section(
-                True,
-                improve_resume_func=lambda a, r: improve_resume(agent, a, r)
-            )
-        else:
-            st.warning("Please analyze a resume first.")
+        improvement_tab(agent)
 
     # ---------------- TAB 5: Improved Resume ----------------
     with tabs[4]:
-        if st.session_state.resume_analyzed:
-            b_backend.improved_resume_section(
-                True,
-                get_improved_resume_func=lambda r, s, template:
-                get_improved_resume(agent, r, s, template)
-            )
-        else:
-            st.warning("Please analyze a resume first.")
+        improved_resume_tab(agent)
 
 
 if __name__ == "__main__":
@@ -2,13 +2,63 @@
 import streamlit as st
 import base64
 import io
-import matplotlib.pyplot as plt
-import traceback
+from collections import OrderedDict
+from functools import lru_cache
 import sys
 
+from agents import (
+    DEFAULT_IMPROVEMENT_AREAS,
+    DEFAULT_INTERVIEW_COUNT,
+    DEFAULT_INTERVIEW_DIFFICULTY,
+    DEFAULT_INTERVIEW_TYPES,
+    EXAMPLE_QUESTIONS,
+)
+from downloads import artifact_store, content_key
+from reports import (
+    build_analysis_report,
+    build_improved_resume_markdown,
+    build_improvements_markdown,
+    build_interview_questions_markdown,
+    clean_weakness_detail,
+)
+
 # ----------------- UI / Helper functions -----------------
 
 
+def render_pdf_lazily(text, template_style):
+    """reportlab is only imported once a PDF is actually requested."""
+    from pdf_renderer import render_pdf
+
+    return render_pdf(text, template_style)
+
+
+def lazy_download_button(label, kind, inputs, generator, file_name, mime):
+    """Download button backed by the managed artifact store.
+
+    Nothing is generated or sent to the browser until the user clicks; the
+    file is then served by URL (no base64 in the page) and cached by a hash
+    of `inputs`, so reruns and repeat clicks reuse the same bytes.
+    """
+    key = content_key(kind, inputs)
+    artifact_id = artifact_store.register(kind, key, generator, file_name, mime)
+
+    def fetch():
+        artifact = artifact_store.get(artifact_id)
+        if artifact is None:  # registration evicted since this render: register again
+            artifact_store.register(kind, key, generator, file_name, mime)
+            artifact = artifact_store.get(artifact_id)
+        return artifact.data
+
+    st.download_button(
+        label=label,
+        data=fetch,
+        file_name=file_name,
+        mime=mime,
+        key=f"dl_{artifact_id}",
+        on_click="ignore",
+    )
+
+
 def setup_page():
     """Apply CSS and small JS fallback for logo errors."""
     apply_custom_css()
@@ -236,7 +286,17 @@ def setup_sidebar():
     with st.sidebar:
         st.header("⚙️ Configuration")
         api_key = st.text_input("OpenAI API Key", type="password")
-    return {"openai_api_key": api_key}
+        scoring_mode = st.radio(
+            "Skill scoring",
+            ["deep", "quick"],
+            format_func=lambda mode: {
+                "deep": "Deep (LLM review)",
+                "quick": "Quick scan (embeddings only)",
+            }[mode],
+            help="Quick scan scores skills by similarity in under a second, "
+                 "without reasoning or weakness details.",
+        )
+    return {"openai_api_key": api_key, "scoring_mode": scoring_mode}
 
 
 def role_selection_section(role_requirements):
@@ -283,9 +343,21 @@ def resume_upload_section():
     return uploaded_resume
 
 
+@lru_cache(maxsize=128)
 def create_score_pie_chart(score):
-    """Create a professional donut chart for the score visualization and return fig."""
-    fig, ax = plt.subplots(figsize=(4, 4), facecolor='#111111')
+    """Render the score donut chart once per score and return PNG bytes.
+
+    Uses a standalone Figure (not pyplot), so nothing is kept in pyplot's
+    global figure registry; the figure is cleared right after rendering.
+    matplotlib is imported here, on the first chart, not at app start.
+    """
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.patches import Circle
+
+    fig = Figure(figsize=(4, 4), facecolor='#111111')
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
 
     sizes = [score, max(0, 100 - score)]
     labels = ['', '']
@@ -301,7 +373,7 @@ def create_score_pie_chart(score):
         wedgeprops={'width': 0.5, 'edgecolor': 'black', 'linewidth': 1},
     )
 
-    center_circle = plt.Circle((0, 0), 0.25, fc='#111111')
+    center_circle = Circle((0, 0), 0.25, fc='#111111')
     ax.add_artist(center_circle)
 
     ax.set_aspect('equal')
@@ -313,22 +385,89 @@ def create_score_pie_chart(score):
     ax.text(0, -0.15, status, ha='center', va='center', fontsize=14, fontweight='bold', color=status_color)
 
     ax.set_facecolor('#111111')
-    plt.tight_layout()
+    fig.tight_layout()
+
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", facecolor=fig.get_facecolor())
+    fig.clear()
+    return buffer.getvalue()
+
+
+# Derived analysis views, keyed by a hash of analysis_result (bounded LRU)
+_analysis_view_cache = OrderedDict()
+_ANALYSIS_VIEW_CACHE_SIZE = 64
 
-    return fig
 
+def build_analysis_view(analysis_result):
+    """Precompute the HTML blocks of the results card (pure, cacheable)."""
+    skill_scores = analysis_result.get("skill_scores", {})
+    detailed_weakness = analysis_result.get("detailed_weakness", []) or analysis_result.get("detailed_weaknesses", [])
+
+    strengths_html = "".join(
+        f'<div class="skill-tag">{skill} ({skill_scores.get(skill, "N/A")}/10)</div>'
+        for skill in analysis_result.get("strengths", [])
+    )
+    missing_html = "".join(
+        f'<div class="skill-tag missing">{skill} ({skill_scores.get(skill, "N/A")}/10)</div>'
+        for skill in analysis_result.get("missing_skills", [])
+    )
 
-def display_analysis_results(analysis_result):
-    """Render analysis results card (expects a dict)."""
+    weakness_blocks = []
+    for weakness in detailed_weakness:
+        skill_name = weakness.get('skill', '')
+        score = weakness.get('score', 0)
+        detail = clean_weakness_detail(
+            weakness.get('detail', 'No specific details provided.'),
+            "The resume lacks concrete examples or well-formatted details for this skill.",
+        )
+
+        parts = [f'<div class="weakness-detail"><strong>Issue:</strong> {detail}</div>']
+        if 'suggestions' in weakness and weakness['suggestions']:
+            parts.append("<strong>How to improve:</strong>")
+            parts.extend(
+                f'<div class="solution-detail">{i+1}. {suggestion}</div>'
+                for i, suggestion in enumerate(weakness['suggestions'])
+            )
+        if 'example' in weakness and weakness['example']:
+            parts.append("<strong>Example addition:</strong>")
+            parts.append(f'<div class="example-detail">{weakness["example"]}</div>')
+
+        weakness_blocks.append((f"{skill_name} (Score: {score}/10)", "".join(parts)))
+
+    return {
+        "strengths_html": strengths_html,
+        "missing_html": missing_html,
+        "weakness_blocks": weakness_blocks,
+    }
+
+
+def cached_analysis_view(analysis_result, result_hash=None):
+    """build_analysis_view memoized by result hash (computed here if not given)."""
+    result_hash = result_hash or content_key(analysis_result)
+    view = _analysis_view_cache.get(result_hash)
+    if view is None:
+        view = build_analysis_view(analysis_result)
+        _analysis_view_cache[result_hash] = view
+        if len(_analysis_view_cache) > _ANALYSIS_VIEW_CACHE_SIZE:
+            _analysis_view_cache.popitem(last=False)
+    else:
+        _analysis_view_cache.move_to_end(result_hash)
+    return result_hash, view
+
+
+def display_analysis_results(analysis_result, result_hash=None):
+    """Render analysis results card (expects a dict).
+
+    `result_hash` (see downloads.content_key) lets callers that already know
+    the hash skip re-hashing the result on every rerun.
+    """
     if not analysis_result:
         return
 
+    result_hash, view = cached_analysis_view(analysis_result, result_hash)
+
     overall_score = analysis_result.get('overall_score', 0)
     selected = analysis_result.get("selected", False)
-    skill_scores = analysis_result.get("skill_scores", {})
-    detailed_weakness = analysis_result.get("detailed_weakness", []) or analysis_result.get("detailed_weaknesses", [])
-    strengths = analysis_result.get("strengths", [])
-    missing_skills = analysis_result.get("missing_skills", [])
 
     st.markdown('<div class="card">', unsafe_allow_html=True)
     st.markdown(
@@ -340,8 +479,7 @@ def display_analysis_results(analysis_result):
 
     with col1:
         st.metric("Overall Score", f"{overall_score}/100")
-        fig = create_score_pie_chart(overall_score)
-        st.pyplot(fig)
+        st.image(create_score_pie_chart(overall_score))
 
     with col2:
         if selected:
@@ -352,100 +490,46 @@ def display_analysis_results(analysis_result):
 
     st.markdown('<hr>', unsafe_allow_html=True)
 
-    st.markdown('<div class="strengths-improvements">', unsafe_allow_html=True)
+    col1, col2 = st.columns(2)
 
     # strengths
-    st.markdown('<div>', unsafe_allow_html=True)
-    st.subheader("Strengths")
-    if strengths:
-        for skill in strengths:
-            st.markdown(f'<div class="skill-tag">{skill} ({skill_scores.get(skill, "N/A")}/10)</div>', unsafe_allow_html=True)
-    else:
-        st.write("No notable strengths identified.")
-    st.markdown('</div>', unsafe_allow_html=True)
+    with col1:
+        st.subheader("Strengths")
+        if view["strengths_html"]:
+            st.markdown(view["strengths_html"], unsafe_allow_html=True)
+        else:
+            st.write("No notable strengths identified.")
 
     # weaknesses
-    st.markdown('<div>', unsafe_allow_html=True)
-    st.subheader("Areas for improvement")
-    if missing_skills:
-        for skill in missing_skills:
-            st.markdown(f'<div class="skill-tag missing">{skill} ({skill_scores.get(skill, "N/A")}/10)</div>', unsafe_allow_html=True)
-    else:
-        st.write("No significant areas for improvements.")
-    st.markdown('</div>', unsafe_allow_html=True)
-
-    st.markdown('</div>', unsafe_allow_html=True)
+    with col2:
+        st.subheader("Areas for improvement")
+        if view["missing_html"]:
+            st.markdown(view["missing_html"], unsafe_allow_html=True)
+        else:
+            st.write("No significant areas for improvements.")
 
     # Detailed weakness section
-    if detailed_weakness:
+    if view["weakness_blocks"]:
         st.markdown('<hr>', unsafe_allow_html=True)
         st.subheader("Detailed Weakness Analysis")
 
-        for weakness in detailed_weakness:
-            skill_name = weakness.get('skill', '')
-            score = weakness.get('score', 0)
-
-            with st.expander(f"{skill_name} (Score: {score}/10)"):
-                detail = weakness.get('detail', 'No specific details provided.')
-                if isinstance(detail, str) and (detail.strip().startswith('```json') or '{' in detail):
-                    detail = "The resume lacks concrete examples or well-formatted details for this skill."
-
-                st.markdown(f'<div class="weakness-detail"><strong>Issue:</strong> {detail}</div>', unsafe_allow_html=True)
-
-                if 'suggestions' in weakness and weakness['suggestions']:
-                    st.markdown("<strong>How to improve:</strong>", unsafe_allow_html=True)
-                    for i, suggestion in enumerate(weakness['suggestions']):
-                        st.markdown(f'<div class="solution-detail">{i+1}. {suggestion}</div>', unsafe_allow_html=True)
-
-                if 'example' in weakness and weakness['example']:
-                    st.markdown("<strong>Example addition:</strong>", unsafe_allow_html=True)
-                    st.markdown(f'<div class="example-detail">{weakness["example"]}</div>', unsafe_allow_html=True)
+        for title, block_html in view["weakness_blocks"]:
+            with st.expander(title):
+                st.markdown(block_html, unsafe_allow_html=True)
 
     st.markdown("___")
 
     # Downloadable report content
     col1, col2, col3 = st.columns([1, 2, 1])
     with col2:
-        report_content = f"""# AI Powered Recruitment - Resume Analysis Report
-
-## Overall Score: {overall_score}/100
-
-Status: {"✅ Shortlisted" if selected else "❌ Not Selected"}
-
-## Analysis Reasoning
-{analysis_result.get('reasoning', 'No reasoning provided.')}
-
-## Strengths
-{', '.join(strengths) if strengths else 'None identified'}
-
-## Missing / Improvement Areas
-{', '.join(missing_skills) if missing_skills else 'None'}
-
-## Detailed weakness Analysis
-"""
-        for weakness in detailed_weakness:
-            skill_name = weakness.get('skill', '')
-            score = weakness.get('score', 0)
-            detail = weakness.get('detail', 'No specific details provided.')
-            if isinstance(detail, str) and (detail.strip().startswith('```json') or '{' in detail):
-                detail = "The resume lacks examples of this skill."
-
-            report_content += f"\n### {skill_name} (Score: {score}/10)\n"
-            report_content += f"Issue: {detail}\n"
-
-            if 'suggestions' in weakness and weakness['suggestions']:
-                report_content += "\nImprovement suggestions:\n"
-                for i, sugg in enumerate(weakness['suggestions']):
-                    report_content += f"- {sugg}\n"
-
-            if 'example' in weakness and weakness['example']:
-                report_content += f"\nExample: {weakness['example']}\n"
-
-        report_content += "\n---\nAnalysis provided by AI Recruitment Agent"
-
-        report_b64 = base64.b64encode(report_content.encode()).decode()
-        href = f'<a class="download-btn" href="data:text/plain;base64,{report_b64}" download="resume_analysis.txt">📊 Download Analysis Report</a>'
-        st.markdown(href, unsafe_allow_html=True)
+        lazy_download_button(
+            "📊 Download Analysis Report",
+            "analysis-report",
+            result_hash,
+            lambda: build_analysis_report(analysis_result),
+            "resume_analysis.txt",
+            "text/plain",
+        )
 
     st.markdown('</div>', unsafe_allow_html=True)
 
@@ -481,17 +565,8 @@ def resume_qa_section(has_resume, ask_question_func=None):
 
     # Example Q&A buttons — FIXED (no rerun)
     with st.expander("Example Questions (Recruiter-style)"):
-        example_questions = [
-            "What is the candidate's most recent role?",
-            "What are the candidate's primary technical skills?",
-            "How many years of experience does the candidate have?",
-            "Does the candidate mention leadership or team management?",
-            "What projects has the candidate completed?",
-            "Are there measurable achievements in the resume?",
-            "Does the resume show domain expertise?",
-        ]
-
-        for question in example_questions:
+        # Shared with the agent, which precomputes these answers after analysis
+        for question in EXAMPLE_QUESTIONS:
             if st.button(f"🔹 {question}", key=f"exa_{question}"):
                 with st.spinner("Generating answer..."):
                     try:
@@ -524,15 +599,17 @@ def interview_questions_section(has_resume, generate_questions_func=None):
         question_types = st.multiselect(
             "Select question types:",
             ["Basic", "Technical", "Experience", "Scenario", "Coding", "Behavioral"],
-            default=["Basic", "Technical"],
+            default=DEFAULT_INTERVIEW_TYPES,
         )
 
     with col2:
         difficulty = st.select_slider(
-            "Question difficulty:", options=["Easy", "Medium", "Hard"], value="Medium"
+            "Question difficulty:",
+            options=["Easy", "Medium", "Hard"],
+            value=DEFAULT_INTERVIEW_DIFFICULTY,
         )
 
-    num_questions = st.slider("Number of questions:", 3, 15, 5)
+    num_questions = st.slider("Number of questions:", 3, 15, DEFAULT_INTERVIEW_COUNT)
 
     if st.button("Generate Interview Questions"):
         if generate_questions_func:
@@ -541,11 +618,7 @@ def interview_questions_section(has_resume, generate_questions_func=None):
                     question_types, difficulty, num_questions
                 )
 
-                download_content = f"# AI Powered - Interview Questions\n\n"
-                download_content += f"Difficulty: {difficulty}\n"
-                download_content += f"Types: {', '.join(question_types)}\n\n"
-
-                for i, item in enumerate(questions):
+                for item in questions:
                     if isinstance(item, (list, tuple)) and len(item) == 2:
                         q_type, question = item
                     else:
@@ -558,23 +631,56 @@ def interview_questions_section(has_resume, generate_questions_func=None):
                         if q_type == "Coding":
                             st.code("# Write your solution here", language="python")
 
-                    download_content += f"## {i+1}. {q_type} Question\n\n"
-                    download_content += f"{question}\n\n"
-                    if q_type == "Coding":
-                        download_content += "```python\n# Write your solution here\n```\n\n"
-
-                download_content += "\n---\nQuestions generated by AI Powered Resume Analyzer And Interview Question Generator"
-
                 if questions:
                     st.markdown("---")
-                    questions_bytes = download_content.encode()
-                    b64 = base64.b64encode(questions_bytes).decode()
-                    href = f'<a class="download-btn" href="data:text/markdown;base64,{b64}" download="interview_question.md">📝 Download All Questions</a>'
-                    st.markdown(href, unsafe_allow_html=True)
+                    lazy_download_button(
+                        "📝 Download All Questions",
+                        "interview-questions",
+                        (questions, difficulty, question_types),
+                        lambda: build_interview_questions_markdown(
+                            questions, difficulty, question_types
+                        ),
+                        "interview_question.md",
+                        "text/markdown",
+                    )
 
     st.markdown('</div>', unsafe_allow_html=True)
 
 
+def render_improvement(area, suggestions):
+    """One improvement area: description, suggestions, before/after example."""
+    with st.expander(f"Improvements for {area}", expanded=True):
+        st.markdown(
+            f"<p>{suggestions.get('description', '')}</p>",
+            unsafe_allow_html=True,
+        )
+
+        st.subheader("Specific Suggestions")
+        for i, suggestion in enumerate(suggestions.get("specific", [])):
+            st.markdown(
+                f'<div class="solution-detail"><strong>{i+1}. </strong> {suggestion}</div>',
+                unsafe_allow_html=True,
+            )
+
+        if "before_after" in suggestions:
+            st.markdown('<div class="comparison-container">', unsafe_allow_html=True)
+            st.markdown('<div class="comparison-box">', unsafe_allow_html=True)
+            st.markdown("<strong>Before:</strong>", unsafe_allow_html=True)
+            st.markdown(
+                f"<pre>{suggestions['before_after'].get('before','')}</pre>",
+                unsafe_allow_html=True,
+            )
+            st.markdown("</div>", unsafe_allow_html=True)
+
+            st.markdown('<div class="comparison-box">', unsafe_allow_html=True)
+            st.markdown("<strong>After:</strong>", unsafe_allow_html=True)
+            st.markdown(
+                f"<pre>{suggestions['before_after'].get('after','')}</pre>",
+                unsafe_allow_html=True,
+            )
+            st.markdown("</div>", unsafe_allow_html=True)
+
+
 def resume_improvement_section(has_resume, improve_resume_func=None):
     """Generate resume improvement suggestions and allow downloads."""
     if not has_resume:
@@ -595,7 +701,7 @@ def resume_improvement_section(has_resume, improve_resume_func=None):
             "Achievements",
             "Overall Structure",
         ],
-        default=["Content", "Skills Highlighting"],
+        default=DEFAULT_IMPROVEMENT_AREAS,
     )
 
     target_role = st.text_input(
@@ -605,85 +711,20 @@ def resume_improvement_section(has_resume, improve_resume_func=None):
     if st.button("Generate Resume Improvements"):
         if improve_resume_func:
             with st.spinner("Analyzing and generating improvements..."):
-                improvements = improve_resume_func(improvements_areas, target_role)
-
-                download_content = (
-                    f"# AI Powered Resume Analyzer And Interview Question Generator\n\n"
+                # Areas are rendered as they finish, not after the slowest one
+                improvements = improve_resume_func(
+                    improvements_areas, target_role, render_improvement
                 )
-                download_content += (
-                    f"Target Role: {target_role if target_role else 'Not specific'}\n\n"
-                )
-
-                for area, suggestions in improvements.items():
-                    with st.expander(f"Improvements for {area}", expanded=True):
-                        st.markdown(
-                            f"<p>{suggestions.get('description', '')}</p>",
-                            unsafe_allow_html=True,
-                        )
-
-                        st.subheader("Specific Suggestions")
-                        for i, suggestion in enumerate(
-                            suggestions.get("specific", [])
-                        ):
-                            st.markdown(
-                                f'<div class="solution-detail"><strong>{i+1}. </strong> {suggestion}</div>',
-                                unsafe_allow_html=True,
-                            )
-
-                        if "before_after" in suggestions:
-                            st.markdown(
-                                '<div class="comparison-container">',
-                                unsafe_allow_html=True,
-                            )
-                            st.markdown(
-                                '<div class="comparison-box">', unsafe_allow_html=True
-                            )
-                            st.markdown(
-                                "<strong>Before:</strong>", unsafe_allow_html=True
-                            )
-                            st.markdown(
-                                f"<pre>{suggestions['before_after'].get('before','')}</pre>",
-                                unsafe_allow_html=True,
-                            )
-                            st.markdown("</div>", unsafe_allow_html=True)
-
-                            st.markdown(
-                                '<div class="comparison-box">', unsafe_allow_html=True
-                            )
-                            st.markdown(
-                                "<strong>After:</strong>", unsafe_allow_html=True
-                            )
-                            st.markdown(
-                                f"<pre>{suggestions['before_after'].get('after','')}</pre>",
-                                unsafe_allow_html=True,
-                            )
-                            st.markdown("</div>", unsafe_allow_html=True)
-                            st.markdown("</div>", unsafe_allow_html=True)
-
-                    download_content += f"## Improvements for {area}\n\n"
-                    download_content += f"{suggestions.get('description','')}\n\n"
-                    download_content += "### Specific Suggestions \n\n"
-                    for i, suggestion in enumerate(suggestions.get("specific", [])):
-                        download_content += f"{i+1}. {suggestion}\n"
-                    download_content += "\n"
-
-                    if "before_after" in suggestions:
-                        download_content += "### Before\n\n"
-                        download_content += (
-                            f"```\n{suggestions['before_after'].get('before','')}\n```\n\n"
-                        )
-                        download_content += "### After\n\n"
-                        download_content += (
-                            f"```\n{suggestions['before_after'].get('after','')}\n```\n\n"
-                        )
-
-                download_content += "\n---\n Provided by AI resume enhancer."
 
                 st.markdown("---")
-                report_bytes = download_content.encode()
-                b64 = base64.b64encode(report_bytes).decode()
-                href = f'<a class="download-btn" href="data:text/markdown;base64,{b64}" download="resume_improvements.md"> Download All Suggestions</a>'
-                st.markdown(href, unsafe_allow_html=True)
+                lazy_download_button(
+                    "Download All Suggestions",
+                    "resume-improvements",
+                    (improvements, target_role),
+                    lambda: build_improvements_markdown(improvements, target_role),
+                    "resume_improvements.md",
+                    "text/markdown",
+                )
 
     st.markdown('</div>', unsafe_allow_html=True)
 
@@ -719,46 +760,39 @@ def improved_resume_section(has_resume, get_improved_resume_func=None):
 
                 st.subheader("Improved Resume")
                 st.text_area("", improved_resume, height=400)
-                 # ⭐ NEW — PDF Generation (calling agent inside Streamlit)
-                # ⭐ FIXED PDF Generation
-                try:
-                    agent = st.session_state.get("resume_agent")
-
-                    if agent is None:
-                        raise Exception("Agent not initialized. Please analyze a resume first.")
-
-                    pdf_bytes = agent.generate_pdf_resume(improved_resume, template_style)
-
-                    st.download_button(
-                        label="📄 Download as PDF",
-                        data=pdf_bytes,
-                        file_name=f"Improved_Resume_{template_style}.pdf",
-                        mime="application/pdf"
-                    )
-                except Exception as e:
-                    st.error(f"PDF generation failed: {e}")
-                    st.text(traceback.format_exc())
 
-
-                col1, col2 = st.columns(2)
+                # Files are generated only when their button is clicked
+                col1, col2, col3 = st.columns(3)
 
                 with col1:
-                    resume_bytes = improved_resume.encode()
-                    b64 = base64.b64encode(resume_bytes).decode()
-                    href = f'<a class="download-btn" href="data:file/txt;base64,{b64}" download="improved_resume.txt"> Download as TXT</a>'
-                    st.markdown(href, unsafe_allow_html=True)
+                    lazy_download_button(
+                        "📄 Download as PDF",
+                        "improved-resume-pdf",
+                        (improved_resume, template_style),
+                        lambda: render_pdf_lazily(improved_resume, template_style),
+                        f"Improved_Resume_{template_style}.pdf",
+                        "application/pdf",
+                    )
 
                 with col2:
-                    md_content = f"""# {target_role if target_role else 'Professional'} Resume
-{improved_resume}
-
-----
-Resume Enhanced By AI
-"""
-                    md_bytes = md_content.encode()
-                    md_b64 = base64.b64encode(md_bytes).decode()
-                    md_href = f'<a class="download-btn" href="data:text/markdown;base64,{md_b64}" download="improved_resume.md"> Download as Markdown</a>'
-                    st.markdown(md_href, unsafe_allow_html=True)
+                    lazy_download_button(
+                        "Download as TXT",
+                        "improved-resume-txt",
+                        improved_resume,
+                        lambda: improved_resume,
+                        "improved_resume.txt",
+                        "text/plain",
+                    )
+
+                with col3:
+                    lazy_download_button(
+                        "Download as Markdown",
+                        "improved-resume-md",
+                        (improved_resume, target_role),
+                        lambda: build_improved_resume_markdown(improved_resume, target_role),
+                        "improved_resume.md",
+                        "text/markdown",
+                    )
 
     st.markdown('</div>', unsafe_allow_html=True)
 
@@ -0,0 +1,138 @@
+"""Cold-start benchmarks: process startup, first paint and import-time profile.
+
+Every measurement runs in a fresh interpreter, so nothing is warm.
+
+    python bench_startup.py                      # startup + first paint
+    python bench_startup.py --importtime agents  # slowest imports of a module
+    python bench_startup.py --record bench_startup.jsonl
+
+--record appends the run to a JSON-lines history and prints the change
+against the previous run, so regressions (e.g. a heavy import creeping
+back to module level) show up in review.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Modules a worker or the UI imports at process start
+STARTUP_MODULES = ["agents", "api_server", "job_queue", "b_backend"]
+
+# First paint: the first full run of app.py (as Streamlit executes it)
+FIRST_PAINT_SCRIPT = """
+import time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file("app.py", default_timeout=120)
+app.run()
+assert not app.exception, app.exception
+print(time.perf_counter() - start)
+"""
+
+
+def _python(code, *flags):
+    """Run code in a fresh interpreter; returns (wall seconds, stdout, stderr)."""
+    start = time.perf_counter()
+    done = subprocess.run(
+        [sys.executable, *flags, "-c", code],
+        cwd=HERE, capture_output=True, text=True, check=True,
+    )
+    return time.perf_counter() - start, done.stdout, done.stderr
+
+
+def measure_startup(module, repeat=5):
+    """Median wall time of `python -c "import module"` (interpreter included)."""
+    return statistics.median(_python(f"import {module}")[0] for _ in range(repeat))
+
+
+def measure_first_paint(repeat=3):
+    """Median time from process start until app.py's first script run completes."""
+    samples = []
+    for _ in range(repeat):
+        wall, stdout, _ = _python(FIRST_PAINT_SCRIPT)
+        samples.append(wall)
+    return statistics.median(samples)
+
+
+def import_profile(module, top=15):
+    """[(cumulative seconds, self seconds, name)] of the slowest imports.
+
+    Parsed from `python -X importtime`; only imports made directly by our
+    own modules (or by the module itself) are listed, so the culprit line is
+    easy to find.
+    """
+    _, _, stderr = _python(f"import {module}", "-X", "importtime")
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        if depth <= 1:
+            rows.append((int(cumulative_us) / 1e6, int(self_us) / 1e6, name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=HERE, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def _last_record(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        lines = [line for line in f if line.strip()]
+    return json.loads(lines[-1]) if lines else None
+
+
+def run_benchmarks(repeat=5, first_paint=True):
+    results = {f"startup_{m}_s": round(measure_startup(m, repeat), 4) for m in STARTUP_MODULES}
+    if first_paint:
+        results["first_paint_s"] = round(measure_first_paint(max(1, repeat // 2)), 4)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cold-start benchmarks")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--no-first-paint", action="store_true")
+    parser.add_argument("--importtime", metavar="MODULE",
+                        help="print the slowest imports of MODULE and exit")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--record", metavar="FILE",
+                        help="append results to a JSON-lines history and compare")
+    args = parser.parse_args()
+
+    if args.importtime:
+        print(f"{'cumulative':>10}  {'self':>8}  module")
+        for cumulative, own, name in import_profile(args.importtime, args.top):
+            print(f"{cumulative:>9.3f}s  {own:>7.3f}s  {name}")
+        sys.exit(0)
+
+    results = run_benchmarks(args.repeat, first_paint=not args.no_first_paint)
+    previous = _last_record(args.record) if args.record else None
+
+    for name, value in results.items():
+        line = f"{name:<28} {value:.3f}s"
+        if previous and name in previous.get("results", {}):
+            before = previous["results"][name]
+            line += f"   ({value - before:+.3f}s vs {previous.get('commit')})"
+        print(line)
+
+    if args.record:
+        record = {"time": time.time(), "commit": _git_commit(),
+                  "python": sys.version.split()[0], "results": results}
+        with open(args.record, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
@@ -0,0 +1,94 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+
+# -------------------- Managed artifact store -------------------- #
+
+def content_key(*parts):
+    """Stable hash of the inputs an artifact is generated from."""
+    payload = json.dumps(parts, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class Artifact:
+    """A generated download: bytes plus the metadata needed to serve them."""
+
+    __slots__ = ("artifact_id", "data", "file_name", "mime")
+
+    def __init__(self, artifact_id, data, file_name, mime):
+        self.artifact_id = artifact_id
+        self.data = data
+        self.file_name = file_name
+        self.mime = mime
+
+
+class ArtifactStore:
+    """Process-wide store of generated downloads, addressed by artifact ID.
+
+    Artifacts are registered with a generator and only produced the first
+    time they are fetched (i.e. when the user actually clicks download).
+    The ID is derived from the artifact kind and a hash of its inputs, so
+    identical reports are generated once and shared. Generated bytes are
+    kept in an LRU bounded by `max_bytes`; evicted ones are regenerated on
+    demand.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, max_registered=2048):
+        self.max_bytes = max_bytes
+        self.max_registered = max_registered
+        self._generators = OrderedDict()  # artifact_id -> (generator, file_name, mime)
+        self._artifacts = OrderedDict()  # artifact_id -> Artifact
+        self._size = 0
+        self._lock = threading.Lock()
+        self._key_locks = {}
+
+    def register(self, kind, key, generator, file_name, mime):
+        """Register a lazily generated artifact; returns its ID (no work done)."""
+        artifact_id = f"{kind}-{key[:24]}"
+        with self._lock:
+            self._generators[artifact_id] = (generator, file_name, mime)
+            self._generators.move_to_end(artifact_id)
+            while len(self._generators) > self.max_registered:
+                stale_id, _ = self._generators.popitem(last=False)
+                self._key_locks.pop(stale_id, None)
+        return artifact_id
+
+    def get(self, artifact_id):
+        """Return the Artifact, generating it on first access (None if unknown)."""
+        with self._lock:
+            artifact = self._artifacts.get(artifact_id)
+            if artifact is not None:
+                self._artifacts.move_to_end(artifact_id)
+                return artifact
+            entry = self._generators.get(artifact_id)
+            if entry is None:
+                return None
+            key_lock = self._key_locks.setdefault(artifact_id, threading.Lock())
+
+        # One generation per artifact even if several clicks race
+        with key_lock:
+            with self._lock:
+                artifact = self._artifacts.get(artifact_id)
+            if artifact is not None:
+                return artifact
+
+            generator, file_name, mime = entry
+            data = generator()
+            if isinstance(data, str):
+                data = data.encode("utf-8")
+            elif hasattr(data, "getvalue"):
+                data = data.getvalue()
+
+            artifact = Artifact(artifact_id, data, file_name, mime)
+            with self._lock:
+                self._artifacts[artifact_id] = artifact
+                self._size += len(data)
+                while self._size > self.max_bytes and len(self._artifacts) > 1:
+                    _, evicted = self._artifacts.popitem(last=False)
+                    self._size -= len(evicted.data)
+            return artifact
+
+
+artifact_store = ArtifactStore()
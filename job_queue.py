@@ -0,0 +1,356 @@
+"""Local SQLite-backed job queue for long-running resume analyses.
+
+No external broker: the UI (or any client) submits jobs into a SQLite
+database and a pool of worker processes claims them by priority, reports
+per-stage progress and persists the result. Identical jobs (same resume
+bytes + same role/skills/JD) are deduplicated onto one job.
+
+Start workers with:  python job_queue.py --db jobs.sqlite3 --workers 4
+"""
+import argparse
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import signal
+import sqlite3
+import time
+import uuid
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id      TEXT PRIMARY KEY,
+    dedup_key   TEXT NOT NULL,
+    priority    INTEGER NOT NULL DEFAULT 0,
+    status      TEXT NOT NULL,          -- queued | running | done | failed
+    stage       TEXT,
+    progress    REAL NOT NULL DEFAULT 0,
+    payload     TEXT NOT NULL,          -- JSON: role/skills, file names, api key
+    resume_blob BLOB NOT NULL,
+    jd_blob     BLOB,
+    result      TEXT,                   -- JSON: agent.export_state()
+    index_blob  BLOB,                   -- serialized FAISS Q&A index
+    error       TEXT,
+    worker_pid  INTEGER,
+    created_at  REAL NOT NULL,
+    updated_at  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_claim ON jobs (status, priority DESC, created_at);
+CREATE INDEX IF NOT EXISTS jobs_dedup ON jobs (dedup_key, status);
+"""
+
+# Interactive UI jobs should overtake bulk screening jobs
+PRIORITY_INTERACTIVE = 10
+PRIORITY_BATCH = 0
+
+# A finished job is handed to identical submissions for this long; after
+# that the analysis runs again (prompts, models or the resume store may
+# have moved on)
+DONE_JOB_REUSE_SECONDS = 3600
+
+
+def analysis_dedup_key(resume_bytes, role_requirements=None, jd_bytes=None,
+                       scoring_mode="deep", api_key=None, model_version=None):
+    """Same file + same role/skills/JD + same scoring mode, API key and
+    model version => same job (a job runs on its submitter's key and quota)."""
+    digest = hashlib.sha256(resume_bytes)
+    digest.update(b"\0skills\0")
+    digest.update(json.dumps(role_requirements or [], sort_keys=True).encode("utf-8"))
+    digest.update(b"\0jd\0")
+    digest.update(jd_bytes or b"")
+    digest.update(b"\0mode\0" + scoring_mode.encode("utf-8"))
+    digest.update(b"\0key\0" + hashlib.sha256((api_key or "").encode("utf-8")).digest())
+    digest.update(b"\0model\0" + (model_version or "").encode("utf-8"))
+    return digest.hexdigest()
+
+
+class JobQueue:
+    """Thin client over the jobs table; safe to use from many processes."""
+
+    def __init__(self, db_path="jobs.sqlite3"):
+        self.db_path = db_path
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def submit(self, resume_bytes, resume_name, api_key, role_requirements=None,
+               jd_bytes=None, jd_name=None, priority=PRIORITY_INTERACTIVE, role_name=None,
+               scoring_mode="deep", model_version=None):
+        """Queue an analysis; returns the job ID (an existing one if deduplicated).
+
+        model_version is the submitting agent's model_version(scoring_mode).
+        The API key is stored only until a worker claims the job.
+        """
+        dedup_key = analysis_dedup_key(
+            resume_bytes, role_requirements, jd_bytes, scoring_mode, api_key, model_version
+        )
+        now = time.time()
+
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            existing = conn.execute(
+                "SELECT job_id, priority, status FROM jobs WHERE dedup_key = ? "
+                "AND (status IN ('queued', 'running') "
+                "OR (status = 'done' AND updated_at >= ?)) "
+                "ORDER BY created_at DESC LIMIT 1",
+                (dedup_key, now - DONE_JOB_REUSE_SECONDS),
+            ).fetchone()
+
+            if existing:
+                # A more urgent duplicate bumps the queued job's priority
+                if existing["status"] == "queued" and priority > existing["priority"]:
+                    conn.execute(
+                        "UPDATE jobs SET priority = ?, updated_at = ? WHERE job_id = ?",
+                        (priority, now, existing["job_id"]),
+                    )
+                conn.execute("COMMIT")
+                return existing["job_id"]
+
+            job_id = uuid.uuid4().hex
+            payload = {
+                "resume_name": resume_name,
+                "role_requirements": role_requirements,
+                "role_name": role_name,
+                "scoring_mode": scoring_mode,
+                "jd_name": jd_name,
+                "api_key": api_key,
+            }
+            conn.execute(
+                "INSERT INTO jobs (job_id, dedup_key, priority, status, stage, payload, "
+                "resume_blob, jd_blob, created_at, updated_at) "
+                "VALUES (?, ?, ?, 'queued', 'queued', ?, ?, ?, ?, ?)",
+                (job_id, dedup_key, priority, json.dumps(payload),
+                 resume_bytes, jd_bytes, now, now),
+            )
+            conn.execute("COMMIT")
+            return job_id
+
+    def claim(self):
+        """Atomically take the most urgent queued job; returns a row or None."""
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE status = 'queued' "
+                "ORDER BY priority DESC, created_at LIMIT 1"
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+
+            # Scrub the key from the stored payload as soon as it is handed over
+            payload = json.loads(row["payload"])
+            stored = dict(payload, api_key=None)
+            conn.execute(
+                "UPDATE jobs SET status = 'running', stage = 'starting', payload = ?, "
+                "worker_pid = ?, updated_at = ? WHERE job_id = ?",
+                (json.dumps(stored), os.getpid(), time.time(), row["job_id"]),
+            )
+            conn.execute("COMMIT")
+            return dict(row, payload=payload)
+
+    def report_progress(self, job_id, stage, progress):
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET stage = ?, progress = ?, updated_at = ? WHERE job_id = ?",
+                (stage, progress, time.time(), job_id),
+            )
+
+    def complete(self, job_id, state, index_bytes=None):
+        """Store the result; False if this worker no longer owns the job."""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = 'done', stage = 'done', progress = 1, "
+                "result = ?, index_blob = ?, updated_at = ? "
+                "WHERE job_id = ? AND status = 'running' AND worker_pid = ?",
+                (json.dumps(state), index_bytes, time.time(), job_id, os.getpid()),
+            )
+            return cursor.rowcount == 1
+
+    def fail(self, job_id, error):
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = 'failed', error = ?, updated_at = ? "
+                "WHERE job_id = ? AND status = 'running' AND worker_pid = ?",
+                (str(error), time.time(), job_id, os.getpid()),
+            )
+            return cursor.rowcount == 1
+
+    def fail_stale(self, older_than=600):
+        """Fail running jobs whose worker process died.
+
+        They cannot be requeued: the API key was scrubbed when the job was
+        claimed, so the client has to resubmit. Jobs of live workers are
+        left alone however long they take.
+        """
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            stale = conn.execute(
+                "SELECT job_id, worker_pid FROM jobs WHERE status = 'running' "
+                "AND updated_at < ?",
+                (time.time() - older_than,),
+            ).fetchall()
+            dead = [row["job_id"] for row in stale if not _pid_alive(row["worker_pid"])]
+            conn.executemany(
+                "UPDATE jobs SET status = 'failed', error = 'worker died; please resubmit', "
+                "updated_at = ? WHERE job_id = ?",
+                [(time.time(), job_id) for job_id in dead],
+            )
+            conn.execute("COMMIT")
+            return len(dead)
+
+    def status(self, job_id):
+        """Small status dict for polling (no blobs)."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT job_id, status, stage, progress, error, priority, created_at, "
+                "updated_at FROM jobs WHERE job_id = ?",
+                (job_id,),
+            ).fetchone()
+        return dict(row) if row else None
+
+    def result(self, job_id):
+        """(state dict, index bytes) for a finished job, else (None, None)."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT result, index_blob FROM jobs WHERE job_id = ? AND status = 'done'",
+                (job_id,),
+            ).fetchone()
+        if row is None or row["result"] is None:
+            return None, None
+        return json.loads(row["result"]), row["index_blob"]
+
+
+# -------------------- Worker processes -------------------- #
+
+def _pid_alive(pid):
+    # Workers run on this host (see WorkerPool), so a signal-0 probe is enough
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class _NamedBytes(io.BytesIO):
+    """Stored upload with a .name, as the agent's extractors expect."""
+
+    def __init__(self, data, name):
+        super().__init__(data)
+        self.name = name
+
+
+def run_job(queue, job):
+    # Imported here so the queue client stays light for the UI process
+    from agents import ResumeAnalysisAgent
+
+    results_store = None
+    if os.environ.get("RESUME_RESULTS_DB"):
+        from results_store import ResultsStore
+        results_store = ResultsStore(os.environ["RESUME_RESULTS_DB"])
+
+    payload = job["payload"]
+    agent = ResumeAnalysisAgent(
+        api_key=payload["api_key"],
+        precompute_example_answers=False,
+        results_store=results_store,
+    )
+    try:
+        custom_jd = None
+        if job["jd_blob"] is not None:
+            custom_jd = _NamedBytes(job["jd_blob"], payload.get("jd_name") or "jd.txt")
+
+        result = agent.analyze_resume(
+            _NamedBytes(job["resume_blob"], payload["resume_name"]),
+            role_requirements=payload.get("role_requirements"),
+            custom_jd=custom_jd,
+            role_name=payload.get("role_name"),
+            scoring_mode=payload.get("scoring_mode"),
+            progress_callback=lambda stage, fraction: queue.report_progress(
+                job["job_id"], stage, fraction
+            ),
+        )
+        # A degraded result (no skills, failed calls) would be served to every
+        # identical submission; fail it so the next one runs again
+        if result is None or not agent._analysis_complete():
+            queue.fail(job["job_id"], "Analysis incomplete (skill extraction or scoring failed)")
+            return
+        state, index_bytes = agent.export_state()
+        queue.complete(job["job_id"], state, index_bytes)
+    finally:
+        agent.cleanup()
+
+
+def worker_loop(db_path, poll_interval=0.5):
+    """Claim and run jobs until terminated."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # parent handles Ctrl+C
+    queue = JobQueue(db_path)
+
+    # Warm up before claiming anything, so no job lands on a cold process
+    from warmup import warmup
+    warmup.run()
+
+    while True:
+        job = queue.claim()
+        if job is None:
+            time.sleep(poll_interval)
+            continue
+        try:
+            run_job(queue, job)
+        except Exception as e:
+            print(f"Error running analysis job {job['job_id']}: {e}")
+            queue.fail(job["job_id"], e)
+
+
+class WorkerPool:
+    """A fixed number of worker processes draining one queue database."""
+
+    def __init__(self, db_path="jobs.sqlite3", processes=2, poll_interval=0.5):
+        self.db_path = db_path
+        self.processes = processes
+        self.poll_interval = poll_interval
+        self._workers = []
+
+    def start(self):
+        JobQueue(self.db_path).fail_stale()
+        for _ in range(self.processes):
+            process = multiprocessing.Process(
+                target=worker_loop, args=(self.db_path, self.poll_interval), daemon=True
+            )
+            process.start()
+            self._workers.append(process)
+
+    def stop(self):
+        for process in self._workers:
+            process.terminate()
+        for process in self._workers:
+            process.join(timeout=5)
+        self._workers = []
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Resume analysis job workers")
+    parser.add_argument("--db", default=os.environ.get("RESUME_JOB_DB", "jobs.sqlite3"))
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args()
+
+    pool = WorkerPool(args.db, processes=args.workers)
+    pool.start()
+    print(f"Started {args.workers} analysis workers on {args.db}")
+    try:
+        while True:
+            time.sleep(60)
+            JobQueue(args.db).fail_stale()
+    except KeyboardInterrupt:
+        pool.stop()
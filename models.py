@@ -0,0 +1,178 @@
+import json
+import os
+import threading
+from collections import deque
+
+
+# -------------------- Task -> model routing -------------------- #
+# temperature / max_tokens of None mean "provider default"
+DEFAULT_TASK_MODELS = {
+    "screening": {"model": "gpt-4o-mini", "temperature": 0, "max_tokens": None, "timeout": 60},
+    "scoring": {"model": "gpt-4o", "temperature": None, "max_tokens": None, "timeout": 60},
+    "weaknesses": {"model": "gpt-4o", "temperature": None, "max_tokens": None, "timeout": 90},
+    "jd_extraction": {"model": "gpt-4o", "temperature": None, "max_tokens": None, "timeout": 60},
+    "profile": {"model": "gpt-4o", "temperature": 0, "max_tokens": None, "timeout": 90},
+    "qa": {"model": "gpt-4o", "temperature": None, "max_tokens": None, "timeout": 30},
+    "interview_questions": {"model": "gpt-4o", "temperature": None, "max_tokens": None, "timeout": 90},
+    "improvement": {"model": "gpt-4o", "temperature": None, "max_tokens": None, "timeout": 90},
+    "rewrite": {"model": "gpt-4o", "temperature": 0.7, "max_tokens": None, "timeout": 120},
+}
+
+# USD per 1M tokens (input, output); override or extend under "prices" in the config
+DEFAULT_PRICES = {
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4.1": (2.00, 8.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1-nano": (0.10, 0.40),
+}
+
+
+class TaskStats:
+    """Latency / token / cost totals for one (task, model) pair."""
+
+    def __init__(self, window=200):
+        self.calls = 0
+        self.errors = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.cost = 0.0
+        self.total_seconds = 0.0
+        self.recent = deque(maxlen=window)  # latencies for percentiles
+
+    def to_dict(self):
+        recent = sorted(self.recent)
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "avg_seconds": self.total_seconds / self.calls if self.calls else None,
+            "p95_seconds": recent[int(0.95 * (len(recent) - 1))] if recent else None,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "cost_usd": round(self.cost, 6),
+        }
+
+
+class ModelRegistry:
+    """Routes each LLM task to a model + settings, and keeps per-task stats.
+
+    Overrides come from a JSON file (RESUME_MODEL_CONFIG), e.g.
+    {"tasks": {"qa": {"model": "gpt-4o-mini", "timeout": 15}}, "prices": {...}}.
+    The file is re-read when it changes, so routes can be tuned from the
+    stats without a code change or restart.
+    """
+
+    def __init__(self, config_path=None):
+        self.config_path = config_path
+        self.tasks = {task: dict(spec) for task, spec in DEFAULT_TASK_MODELS.items()}
+        self.prices = dict(DEFAULT_PRICES)
+        self._config_mtime = None
+        self._lock = threading.Lock()
+        self._stats = {}  # (task, model) -> TaskStats
+        self.maybe_reload()
+
+    def load(self, config):
+        """Apply a config dict on top of the defaults."""
+        tasks = {task: dict(spec) for task, spec in DEFAULT_TASK_MODELS.items()}
+        for task, overrides in (config.get("tasks") or {}).items():
+            tasks.setdefault(task, dict(DEFAULT_TASK_MODELS["qa"])).update(overrides)
+        prices = dict(DEFAULT_PRICES)
+        prices.update({m: tuple(p) for m, p in (config.get("prices") or {}).items()})
+        with self._lock:
+            self.tasks = tasks
+            self.prices = prices
+
+    def maybe_reload(self):
+        if not self.config_path:
+            return
+        try:
+            mtime = os.path.getmtime(self.config_path)
+            if mtime == self._config_mtime:
+                return
+            with open(self.config_path, encoding="utf-8") as f:
+                self.load(json.load(f))
+            self._config_mtime = mtime
+        except Exception as e:
+            print(f"Error loading model config {self.config_path}: {e}")
+            self._config_mtime = None
+
+    def spec(self, task):
+        self.maybe_reload()
+        with self._lock:
+            return dict(self.tasks.get(task) or self.tasks["qa"])
+
+    def chat(self, task, api_key):
+        """A ChatOpenAI client configured for this task."""
+        from langchain_openai import ChatOpenAI  # heavy; only once a model is needed
+
+        spec = self.spec(task)
+        kwargs = {"model": spec["model"], "api_key": api_key}
+        if spec.get("temperature") is not None:
+            kwargs["temperature"] = spec["temperature"]
+        if spec.get("max_tokens") is not None:
+            kwargs["max_tokens"] = spec["max_tokens"]
+        if spec.get("timeout") is not None:
+            kwargs["timeout"] = spec["timeout"]
+        return ChatOpenAI(**kwargs)
+
+    def estimate_cost(self, task, input_tokens, output_tokens):
+        """Expected USD cost of one call for this task at the routed model's price."""
+        model = self.spec(task)["model"]
+        with self._lock:
+            price_in, price_out = self.prices.get(model, (0.0, 0.0))
+        return (input_tokens * price_in + output_tokens * price_out) / 1_000_000
+
+    # ---- stats ---- #
+
+    def record(self, task, model, seconds, response=None, error=False):
+        usage = getattr(response, "usage_metadata", None) or {}
+        input_tokens = usage.get("input_tokens", 0)
+        output_tokens = usage.get("output_tokens", 0)
+
+        with self._lock:
+            stats = self._stats.setdefault((task, model), TaskStats())
+            price_in, price_out = self.prices.get(model, (0.0, 0.0))
+            stats.calls += 1
+            stats.errors += int(error)
+            stats.total_seconds += seconds
+            stats.recent.append(seconds)
+            stats.input_tokens += input_tokens
+            stats.output_tokens += output_tokens
+            stats.cost += (input_tokens * price_in + output_tokens * price_out) / 1_000_000
+
+    def stats(self):
+        """{task: {"route": spec, "models": {model: stats}}} for every task."""
+        with self._lock:
+            report = {
+                task: {"route": dict(spec), "models": {}}
+                for task, spec in self.tasks.items()
+            }
+            for (task, model), stats in self._stats.items():
+                report.setdefault(task, {"route": None, "models": {}})
+                report[task]["models"][model] = stats.to_dict()
+        return report
+
+
+model_registry = ModelRegistry(os.environ.get("RESUME_MODEL_CONFIG"))
+
+
+# -------------------- Pooled HTTP -------------------- #
+# langchain_openai already shares one httpx client per (base URL, timeout)
+# across ChatOpenAI instances; embeddings get a new client per instance
+# unless given one, so they share this pool (kept warm by warmup.py).
+_http_client = None
+_http_lock = threading.Lock()
+
+
+def openai_base_url():
+    return os.environ.get("OPENAI_BASE_URL") or "https://api.openai.com/v1"
+
+
+def shared_http_client():
+    global _http_client
+    with _http_lock:
+        if _http_client is None:
+            import httpx
+
+            _http_client = httpx.Client(timeout=60)
+        return _http_client
@@ -0,0 +1,323 @@
+import io
+import re
+
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.units import inch
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.pdfgen import canvas
+
+
+# -------------------- Template styles -------------------- #
+# Matches the template names offered in the "Improved Resume" tab
+TEMPLATE_STYLES = {
+    "Classic": {
+        "body_font": "Times-Roman",
+        "bold_font": "Times-Bold",
+        "body_size": 10.5,
+        "heading_size": 12.5,
+        "title_size": 18,
+        "accent": (0, 0, 0),
+        "heading_rule": True,
+        "heading_upper": True,
+        "center_title": True,
+        "margin": 0.75 * inch,
+        "leading": 1.3,
+        "bullet": "•",
+    },
+    "Modern": {
+        "body_font": "Helvetica",
+        "bold_font": "Helvetica-Bold",
+        "body_size": 10,
+        "heading_size": 12,
+        "title_size": 20,
+        "accent": (0.83, 0.18, 0.18),
+        "heading_rule": True,
+        "heading_upper": True,
+        "center_title": False,
+        "margin": 0.7 * inch,
+        "leading": 1.35,
+        "bullet": "•",
+    },
+    "Minimal": {
+        "body_font": "Helvetica",
+        "bold_font": "Helvetica-Bold",
+        "body_size": 9.5,
+        "heading_size": 10.5,
+        "title_size": 15,
+        "accent": (0.2, 0.2, 0.2),
+        "heading_rule": False,
+        "heading_upper": False,
+        "center_title": False,
+        "margin": 0.8 * inch,
+        "leading": 1.25,
+        "bullet": "-",
+    },
+    "ATS Friendly": {
+        "body_font": "Helvetica",
+        "bold_font": "Helvetica-Bold",
+        "body_size": 10.5,
+        "heading_size": 11.5,
+        "title_size": 14,
+        "accent": (0, 0, 0),
+        "heading_rule": False,
+        "heading_upper": True,
+        "center_title": False,
+        "margin": 0.75 * inch,
+        "leading": 1.3,
+        "bullet": "-",
+    },
+    "Creative": {
+        "body_font": "Helvetica",
+        "bold_font": "Helvetica-Bold",
+        "body_size": 10,
+        "heading_size": 13,
+        "title_size": 22,
+        "accent": (0.1, 0.46, 0.82),
+        "heading_rule": True,
+        "heading_upper": False,
+        "center_title": True,
+        "margin": 0.7 * inch,
+        "leading": 1.4,
+        "bullet": "➤",
+    },
+}
+
+# The built-in PDF fonts only cover cp1252; map common resume glyphs onto it
+GLYPH_REPLACEMENTS = str.maketrans({
+    "●": "•", "▪": "•", "■": "•", "◦": "•", "‣": "•", "➢": "•", "➤": "•",
+    "✓": "•", "✔": "•", "→": "->", "\t": "    ",
+})
+
+BULLET_RE = re.compile(r"^\s*(?:[-*•●▪■◦‣➢➤✓✔]|\d+[.)])\s+")
+MARKDOWN_BOLD_RE = re.compile(r"\*\*(.+?)\*\*|__(.+?)__")
+MULTI_SPACE_RE = re.compile(r" {2,}")
+
+
+# -------------------- Font metrics cache -------------------- #
+_char_widths = {}  # (font, size) -> {char: width in points}
+
+
+def char_widths(font, size):
+    """Per-font/size glyph width table, filled lazily and shared process-wide."""
+    key = (font, size)
+    table = _char_widths.get(key)
+    if table is None:
+        table = _char_widths[key] = {}
+    return table
+
+
+def text_width(text, font, size):
+    """Width of text in points, summed from the cached glyph widths."""
+    table = char_widths(font, size)
+    width = 0.0
+    for ch in text:
+        w = table.get(ch)
+        if w is None:
+            w = table[ch] = stringWidth(ch, font, size)
+        width += w
+    return width
+
+
+def clean_text(text):
+    """Strip markdown emphasis and replace glyphs the base fonts can't draw."""
+    text = MARKDOWN_BOLD_RE.sub(lambda m: m.group(1) or m.group(2), text)
+    text = text.translate(GLYPH_REPLACEMENTS)
+    return text.encode("cp1252", "replace").decode("cp1252")
+
+
+def wrap_line(text, font, size, max_width):
+    """Yield the pieces of one line that fit max_width (greedy word wrap).
+
+    Words wider than a whole line are broken by character. Runs of spaces
+    are collapsed first, so each gap measures (and prints) as one space.
+    """
+    text = MULTI_SPACE_RE.sub(" ", text)
+    space = text_width(" ", font, size)
+    start = 0
+    line_width = 0.0
+    pos = 0
+    length = len(text)
+
+    while pos < length:
+        next_space = text.find(" ", pos)
+        word_end = length if next_space == -1 else next_space
+        word_width = text_width(text[pos:word_end], font, size)
+
+        if word_width > max_width:
+            # Flush what we have, then hard-break the long word
+            if pos > start:
+                yield text[start:pos].rstrip()
+            cut = pos
+            width = 0.0
+            for i in range(pos, word_end):
+                w = text_width(text[i], font, size)
+                if width + w > max_width and i > cut:
+                    yield text[cut:i]
+                    cut = i
+                    width = 0.0
+                width += w
+            start = cut
+            line_width = width
+        elif pos > start and line_width + space + word_width > max_width:
+            yield text[start:pos].rstrip()
+            start = pos
+            line_width = word_width
+        else:
+            line_width += (space if pos > start else 0.0) + word_width
+
+        pos = word_end + 1
+        while pos < length and text[pos] == " ":
+            pos += 1
+
+    if start < length and text[start:].strip():
+        yield text[start:].rstrip()
+
+
+# -------------------- Renderer -------------------- #
+class PDFRenderer:
+    """Single-pass, streaming PDF renderer for resumes and reports.
+
+    Lines are classified (title, heading, bullet, paragraph), wrapped by
+    measured width and drawn immediately; pages break as the cursor runs
+    out of room. Markdown (#, ##, ###, -, **bold**) and plain resume text
+    (ALL-CAPS headings, unicode bullets) are both understood.
+    """
+
+    def __init__(self, template_style="Classic", pagesize=letter):
+        self.style = TEMPLATE_STYLES.get(template_style, TEMPLATE_STYLES["Classic"])
+        self.pagesize = pagesize
+        self.page_width, self.page_height = pagesize
+        self.margin = self.style["margin"]
+        self.content_width = self.page_width - 2 * self.margin
+
+    def render(self, text, out=None):
+        """Render one document into `out` (any binary file-like); returns it."""
+        return self.render_many([text], out)
+
+    def render_many(self, texts, out=None):
+        """Render several documents into one PDF, each starting on a new page."""
+        out = out if out is not None else io.BytesIO()
+        self._canvas = canvas.Canvas(out, pagesize=self.pagesize)
+        self._canvas.setTitle("Resume")
+
+        for i, text in enumerate(texts):
+            if i:
+                self._canvas.showPage()
+            self._y = self.page_height - self.margin
+            self._render_document(text)
+
+        self._canvas.save()
+        self._canvas = None
+        if hasattr(out, "seek"):
+            out.seek(0)
+        return out
+
+    # ---- layout ---- #
+
+    def _render_document(self, text):
+        style = self.style
+        seen_title = False
+
+        for raw_line in text.split("\n"):
+            line = clean_text(raw_line.rstrip())
+            stripped = line.strip()
+
+            if not stripped:
+                self._ensure_room(style["body_size"] * 0.6)
+                self._y -= style["body_size"] * 0.6
+                continue
+
+            if stripped.startswith("# ") or (not seen_title and not stripped.startswith("#")):
+                seen_title = True
+                self._draw_title(stripped.lstrip("#").strip())
+            elif stripped.startswith("## ") or self._is_plain_heading(stripped):
+                self._draw_heading(stripped.lstrip("#").strip().rstrip(":"))
+            elif stripped.startswith("### "):
+                self._draw_paragraph(stripped[4:].strip(), font=style["bold_font"])
+            elif stripped in ("---", "___", "----"):
+                self._draw_rule(0.5)
+            elif BULLET_RE.match(stripped):
+                self._draw_bullet(BULLET_RE.sub("", stripped, count=1))
+            else:
+                self._draw_paragraph(stripped)
+
+    @staticmethod
+    def _is_plain_heading(line):
+        letters = [ch for ch in line if ch.isalpha()]
+        return len(line) <= 40 and len(letters) >= 3 and line.rstrip(":").isupper()
+
+    def _ensure_room(self, height):
+        if self._y - height < self.margin:
+            self._canvas.showPage()
+            self._y = self.page_height - self.margin
+
+    def _draw_title(self, text):
+        style = self.style
+        size = style["title_size"]
+        self._canvas.setFillColorRGB(*style["accent"])
+        for piece in wrap_line(text, style["bold_font"], size, self.content_width):
+            self._ensure_room(size * 1.2)
+            self._y -= size
+            self._canvas.setFont(style["bold_font"], size)
+            if style["center_title"]:
+                self._canvas.drawCentredString(self.page_width / 2, self._y, piece)
+            else:
+                self._canvas.drawString(self.margin, self._y, piece)
+            self._y -= size * 0.3
+        self._canvas.setFillColorRGB(0, 0, 0)
+
+    def _draw_heading(self, text):
+        style = self.style
+        size = style["heading_size"]
+        if style["heading_upper"]:
+            text = text.upper()
+
+        # Keep the heading together with at least one body line
+        self._ensure_room(size * 1.8 + style["body_size"] * style["leading"])
+        self._y -= size * 0.8
+        self._canvas.setFillColorRGB(*style["accent"])
+        for piece in wrap_line(text, style["bold_font"], size, self.content_width):
+            self._y -= size
+            self._canvas.setFont(style["bold_font"], size)
+            self._canvas.drawString(self.margin, self._y, piece)
+        self._canvas.setFillColorRGB(0, 0, 0)
+
+        if style["heading_rule"]:
+            self._y -= 3
+            self._draw_rule(0.8, color=style["accent"])
+        self._y -= size * 0.4
+
+    def _draw_rule(self, width, color=(0.6, 0.6, 0.6)):
+        self._ensure_room(width)
+        self._canvas.setStrokeColorRGB(*color)
+        self._canvas.setLineWidth(width)
+        self._canvas.line(self.margin, self._y, self.page_width - self.margin, self._y)
+        self._canvas.setStrokeColorRGB(0, 0, 0)
+
+    def _draw_paragraph(self, text, font=None, indent=0.0):
+        style = self.style
+        font = font or style["body_font"]
+        size = style["body_size"]
+        line_height = size * style["leading"]
+
+        for piece in wrap_line(text, font, size, self.content_width - indent):
+            self._ensure_room(line_height)
+            self._y -= line_height
+            self._canvas.setFont(font, size)
+            self._canvas.drawString(self.margin + indent, self._y, piece)
+
+    def _draw_bullet(self, text):
+        style = self.style
+        size = style["body_size"]
+        bullet = clean_text(style["bullet"])
+        indent = text_width(bullet + "  ", style["body_font"], size) + 6
+
+        self._ensure_room(size * style["leading"])
+        self._canvas.setFont(style["body_font"], size)
+        self._canvas.drawString(self.margin + 6, self._y - size * style["leading"], bullet)
+        self._draw_paragraph(text, indent=indent)
+
+
+def render_pdf(text, template_style="Classic", out=None):
+    """Render text (resume or markdown report) to PDF; returns the buffer."""
+    return PDFRenderer(template_style).render(text, out)
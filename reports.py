@@ -0,0 +1,215 @@
+import re
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+
+# -------------------- Report builders -------------------- #
+
+def clean_weakness_detail(detail, fallback):
+    """LLM details sometimes leak raw JSON; show a readable sentence instead."""
+    if isinstance(detail, str) and (detail.strip().startswith("```json") or "{" in detail):
+        return fallback
+    return detail
+
+
+def build_analysis_report(analysis_result, candidate_name=None):
+    """Markdown analysis report for one candidate (also used for TXT export)."""
+    overall_score = analysis_result.get("overall_score", 0)
+    selected = analysis_result.get("selected", False)
+    strengths = analysis_result.get("strengths", [])
+    missing_skills = analysis_result.get("missing_skills", [])
+    detailed_weakness = (
+        analysis_result.get("detailed_weakness", [])
+        or analysis_result.get("detailed_weaknesses", [])
+    )
+
+    parts = ["# AI Powered Recruitment - Resume Analysis Report\n"]
+    if candidate_name:
+        parts.append(f"Candidate: {candidate_name}\n")
+    parts.append(f"""
+## Overall Score: {overall_score}/100
+
+Status: {"✅ Shortlisted" if selected else "❌ Not Selected"}
+
+## Analysis Reasoning
+{analysis_result.get('reasoning', 'No reasoning provided.')}
+
+## Strengths
+{', '.join(strengths) if strengths else 'None identified'}
+
+## Missing / Improvement Areas
+{', '.join(missing_skills) if missing_skills else 'None'}
+
+## Detailed weakness Analysis
+""")
+
+    for weakness in detailed_weakness:
+        skill_name = weakness.get("skill", "")
+        score = weakness.get("score", 0)
+        detail = clean_weakness_detail(
+            weakness.get("detail", "No specific details provided."),
+            "The resume lacks examples of this skill.",
+        )
+
+        parts.append(f"\n### {skill_name} (Score: {score}/10)\n")
+        parts.append(f"Issue: {detail}\n")
+
+        if weakness.get("suggestions"):
+            parts.append("\nImprovement suggestions:\n")
+            parts.extend(f"- {sugg}\n" for sugg in weakness["suggestions"])
+
+        if weakness.get("example"):
+            parts.append(f"\nExample: {weakness['example']}\n")
+
+    parts.append("\n---\nAnalysis provided by AI Recruitment Agent")
+    return "".join(parts)
+
+
+def markdown_to_text(markdown):
+    """Plain-text version of a generated Markdown report (for .txt exports)."""
+    lines = []
+    for line in markdown.splitlines():
+        if line.startswith("```"):
+            continue
+        heading = re.match(r"(#+)\s*(.*)", line)
+        if heading:
+            title = heading.group(2).strip()
+            underline = "=" if len(heading.group(1)) == 1 else "-"
+            lines += [title, underline * len(title)]
+            continue
+        lines.append(re.sub(r"\*\*(.+?)\*\*", r"\1", line))
+    return "\n".join(lines) + "\n"
+
+
+def build_interview_questions_markdown(questions, difficulty, question_types):
+    """Markdown export of generated interview questions."""
+    parts = [
+        "# AI Powered - Interview Questions\n\n",
+        f"Difficulty: {difficulty}\n",
+        f"Types: {', '.join(question_types)}\n\n",
+    ]
+
+    for i, item in enumerate(questions):
+        if isinstance(item, (list, tuple)) and len(item) == 2:
+            q_type, question = item
+        else:
+            q_type = "General"
+            question = str(item)
+
+        parts.append(f"## {i+1}. {q_type} Question\n\n")
+        parts.append(f"{question}\n\n")
+        if q_type == "Coding":
+            parts.append("```python\n# Write your solution here\n```\n\n")
+
+    parts.append("\n---\nQuestions generated by AI Powered Resume Analyzer And Interview Question Generator")
+    return "".join(parts)
+
+
+def build_improvements_markdown(improvements, target_role=""):
+    """Markdown export of resume improvement suggestions."""
+    parts = [
+        "# AI Powered Resume Analyzer And Interview Question Generator\n\n",
+        f"Target Role: {target_role if target_role else 'Not specific'}\n\n",
+    ]
+
+    for area, suggestions in improvements.items():
+        parts.append(f"## Improvements for {area}\n\n")
+        parts.append(f"{suggestions.get('description','')}\n\n")
+        parts.append("### Specific Suggestions \n\n")
+        for i, suggestion in enumerate(suggestions.get("specific", [])):
+            parts.append(f"{i+1}. {suggestion}\n")
+        parts.append("\n")
+
+        if "before_after" in suggestions:
+            parts.append("### Before\n\n")
+            parts.append(f"```\n{suggestions['before_after'].get('before','')}\n```\n\n")
+            parts.append("### After\n\n")
+            parts.append(f"```\n{suggestions['before_after'].get('after','')}\n```\n\n")
+
+    parts.append("\n---\n Provided by AI resume enhancer.")
+    return "".join(parts)
+
+
+def build_improved_resume_markdown(improved_resume, target_role=""):
+    """Markdown export of the rewritten resume."""
+    return f"""# {target_role if target_role else 'Professional'} Resume
+{improved_resume}
+
+----
+Resume Enhanced By AI
+"""
+
+
+# -------------------- Batch export -------------------- #
+
+def _slug(name):
+    slug = re.sub(r"[^A-Za-z0-9._-]+", "_", name or "").strip("._")
+    return slug[:60] or "candidate"
+
+
+def render_candidate_files(index, candidate, formats, template_style="ATS Friendly"):
+    """Render one candidate's report files: returns [(arcname, bytes)].
+
+    Top-level so it can run in a worker process.
+    """
+    from pdf_renderer import render_pdf  # reportlab only once a PDF is rendered
+
+    name = candidate.get("name") or f"candidate_{index + 1}"
+    prefix = f"{index + 1:04d}_{_slug(name)}"
+    report = build_analysis_report(candidate.get("analysis_result") or {}, name)
+
+    files = []
+    if "md" in formats:
+        files.append((f"{prefix}/analysis_report.md", report.encode("utf-8")))
+    if "txt" in formats:
+        files.append((f"{prefix}/analysis_report.txt", markdown_to_text(report).encode("utf-8")))
+    if "pdf" in formats:
+        files.append((f"{prefix}/analysis_report.pdf", render_pdf(report, template_style).getvalue()))
+
+    improved_resume = candidate.get("improved_resume")
+    if improved_resume:
+        if "txt" in formats:
+            files.append((f"{prefix}/improved_resume.txt", improved_resume.encode("utf-8")))
+        if "pdf" in formats:
+            files.append((f"{prefix}/improved_resume.pdf", render_pdf(improved_resume, template_style).getvalue()))
+
+    return files
+
+
+def export_reports_zip(candidates, out, formats=("pdf", "txt", "md"),
+                       max_workers=4, use_processes=True, template_style="ATS Friendly"):
+    """Render reports for many candidates in parallel and stream them into a zip.
+
+    `candidates` is any iterable of dicts with "name", "analysis_result" and
+    optionally "improved_resume". `out` is a path or a binary file-like
+    object (it does not need to be seekable, so an HTTP response stream
+    works). At most 2 * max_workers candidates are rendered or waiting to be
+    written at any time, and files are written in input order.
+    Returns the number of candidates exported.
+    """
+    formats = tuple(formats)
+    pool_cls = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+    window = max_workers * 2
+    in_flight = deque()
+    exported = 0
+
+    with zipfile.ZipFile(out, "w", compression=zipfile.ZIP_DEFLATED) as archive, \
+            pool_cls(max_workers=max_workers) as pool:
+
+        def drain_one():
+            for arcname, data in in_flight.popleft().result():
+                archive.writestr(arcname, data)
+
+        for index, candidate in enumerate(candidates):
+            in_flight.append(
+                pool.submit(render_candidate_files, index, candidate, formats, template_style)
+            )
+            exported += 1
+            if len(in_flight) >= window:
+                drain_one()
+
+        while in_flight:
+            drain_one()
+
+    return exported
@@ -0,0 +1,238 @@
+"""Persistent SQLite store of finished resume analyses.
+
+Each analysis is keyed by (resume text hash, role/JD hash, model version),
+so re-opening a candidate, or re-running the same resume against the same
+role with the same models, is served from disk instead of paying for a new
+analysis. Per-skill scores get their own indexed table for triage queries:
+
+    store.find(role="Data Engineer", min_score=75, lacking=["Airflow"])
+
+or from the shell:
+
+    python results_store.py --role "Data Engineer" --min-score 75 --lacking Airflow
+"""
+import argparse
+import json
+import os
+import sqlite3
+import time
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS analyses (
+    analysis_id   INTEGER PRIMARY KEY,
+    resume_hash   TEXT NOT NULL,
+    criteria_hash TEXT NOT NULL,        -- hash of the JD text or the role's skill list
+    model_version TEXT NOT NULL,
+    scoring_mode  TEXT NOT NULL DEFAULT 'deep',   -- deep | quick
+    role          TEXT,
+    candidate     TEXT,                 -- uploaded file name
+    overall_score INTEGER,
+    selected      INTEGER,
+    state         TEXT NOT NULL,        -- JSON: agent.export_state()
+    index_blob    BLOB,                 -- serialized FAISS Q&A index
+    created_at    REAL NOT NULL,
+    UNIQUE (resume_hash, criteria_hash, model_version)
+);
+CREATE INDEX IF NOT EXISTS analyses_created ON analyses (created_at);
+
+CREATE TABLE IF NOT EXISTS skill_scores (
+    analysis_id INTEGER NOT NULL REFERENCES analyses (analysis_id) ON DELETE CASCADE,
+    skill_key   TEXT NOT NULL,
+    skill       TEXT NOT NULL,
+    score       INTEGER NOT NULL,
+    PRIMARY KEY (analysis_id, skill_key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS skill_scores_skill ON skill_scores (skill_key, score, analysis_id);
+"""
+
+# Created after MIGRATIONS, since they index columns older databases lack
+INDEXES = """
+CREATE INDEX IF NOT EXISTS analyses_mode_role_score ON analyses (scoring_mode, role, overall_score);
+CREATE INDEX IF NOT EXISTS analyses_mode_score ON analyses (scoring_mode, overall_score);
+"""
+
+# (table, column, definition) added to databases created before the column existed
+MIGRATIONS = [
+    ("analyses", "scoring_mode", "TEXT NOT NULL DEFAULT 'deep'"),
+]
+
+# Same thresholds as the analysis: <= 5 is a missing skill, >= 7 a strength
+MISSING_MAX_SCORE = 5
+STRENGTH_MIN_SCORE = 7
+
+
+def _skill_key(skill):
+    # Same normalization as agents.skill_key
+    return " ".join(str(skill).lower().split())
+
+
+class ResultsStore:
+    """Thin client over the results database; safe to use from many processes."""
+
+    def __init__(self, db_path="results.sqlite3"):
+        self.db_path = db_path
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+            for table, column, definition in MIGRATIONS:
+                columns = {row["name"] for row in conn.execute(f"PRAGMA table_info({table})")}
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+            conn.executescript(INDEXES)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        return conn
+
+    def get(self, resume_hash, criteria_hash, model_version):
+        """(state dict, index bytes) of a stored analysis, else (None, None)."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT state, index_blob FROM analyses WHERE resume_hash = ? "
+                "AND criteria_hash = ? AND model_version = ?",
+                (resume_hash, criteria_hash, model_version),
+            ).fetchone()
+        if row is None:
+            return None, None
+        return json.loads(row["state"]), row["index_blob"]
+
+    def save(self, resume_hash, criteria_hash, model_version, state, index_bytes=None,
+             role=None, candidate=None):
+        """Insert or replace one analysis and its per-skill scores; returns its ID."""
+        result = state.get("analysis_result") or {}
+        skill_scores = result.get("skill_scores") or {}
+
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "DELETE FROM analyses WHERE resume_hash = ? AND criteria_hash = ? "
+                "AND model_version = ?",
+                (resume_hash, criteria_hash, model_version),
+            )
+            cursor = conn.execute(
+                "INSERT INTO analyses (resume_hash, criteria_hash, model_version, scoring_mode, "
+                "role, candidate, overall_score, selected, state, index_blob, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (resume_hash, criteria_hash, model_version,
+                 result.get("scoring_mode") or "deep", role, candidate,
+                 result.get("overall_score"), int(bool(result.get("selected"))),
+                 json.dumps(state), index_bytes, time.time()),
+            )
+            analysis_id = cursor.lastrowid
+            conn.executemany(
+                "INSERT OR REPLACE INTO skill_scores (analysis_id, skill_key, skill, score) "
+                "VALUES (?, ?, ?, ?)",
+                [(analysis_id, _skill_key(skill), skill, int(score))
+                 for skill, score in skill_scores.items()],
+            )
+            conn.execute("COMMIT")
+        return analysis_id
+
+    def load(self, analysis_id):
+        """(state dict, index bytes) by ID, e.g. for a row returned by find()."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT state, index_blob FROM analyses WHERE analysis_id = ?",
+                (analysis_id,),
+            ).fetchone()
+        if row is None:
+            return None, None
+        return json.loads(row["state"]), row["index_blob"]
+
+    def find(self, role=None, min_score=None, max_score=None, lacking=(), having=(),
+             since=None, model_version=None, scoring_mode="deep", limit=100):
+        """Summary rows of matching analyses, best score first.
+
+        `lacking` skills were scored <= MISSING_MAX_SCORE or not assessed at
+        all; `having` skills were scored >= STRENGTH_MIN_SCORE. `since` is a
+        Unix timestamp. Only deep analyses by default: quick-scan scores are
+        coarser and not comparable; scoring_mode=None returns both kinds.
+        Each row carries its per-skill scores.
+        """
+        where, params = [], []
+        if scoring_mode is not None:
+            where.append("a.scoring_mode = ?")
+            params.append(scoring_mode)
+        if role is not None:
+            where.append("a.role = ?")
+            params.append(role)
+        if min_score is not None:
+            where.append("a.overall_score >= ?")
+            params.append(min_score)
+        if max_score is not None:
+            where.append("a.overall_score <= ?")
+            params.append(max_score)
+        if since is not None:
+            where.append("a.created_at >= ?")
+            params.append(since)
+        if model_version is not None:
+            where.append("a.model_version = ?")
+            params.append(model_version)
+        for skill in lacking:
+            where.append(
+                "NOT EXISTS (SELECT 1 FROM skill_scores s WHERE s.skill_key = ? "
+                "AND s.score > ? AND s.analysis_id = a.analysis_id)"
+            )
+            params += [_skill_key(skill), MISSING_MAX_SCORE]
+        for skill in having:
+            where.append(
+                "EXISTS (SELECT 1 FROM skill_scores s WHERE s.skill_key = ? "
+                "AND s.score >= ? AND s.analysis_id = a.analysis_id)"
+            )
+            params += [_skill_key(skill), STRENGTH_MIN_SCORE]
+
+        sql = (
+            "SELECT a.analysis_id, a.resume_hash, a.model_version, a.scoring_mode, a.role, "
+            "a.candidate, a.overall_score, a.selected, a.created_at FROM analyses a"
+        )
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY a.overall_score DESC, a.created_at DESC LIMIT ?"
+        params.append(limit)
+
+        with self._connect() as conn:
+            rows = {row["analysis_id"]: dict(row, skill_scores={})
+                    for row in conn.execute(sql, params)}
+            if rows:
+                placeholders = ", ".join("?" * len(rows))
+                for skill in conn.execute(
+                    "SELECT analysis_id, skill, score FROM skill_scores "
+                    f"WHERE analysis_id IN ({placeholders})",
+                    list(rows),
+                ):
+                    rows[skill["analysis_id"]]["skill_scores"][skill["skill"]] = skill["score"]
+        return list(rows.values())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query stored resume analyses")
+    parser.add_argument("--db", default=os.environ.get("RESUME_RESULTS_DB", "results.sqlite3"))
+    parser.add_argument("--role")
+    parser.add_argument("--min-score", type=int)
+    parser.add_argument("--max-score", type=int)
+    parser.add_argument("--lacking", action="append", default=[])
+    parser.add_argument("--having", action="append", default=[])
+    parser.add_argument("--days", type=float, help="only analyses from the last N days")
+    parser.add_argument("--mode", choices=["deep", "quick", "all"], default="deep",
+                        help="scoring mode of the analyses to list (default: deep)")
+    parser.add_argument("--limit", type=int, default=100)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    rows = ResultsStore(args.db).find(
+        role=args.role,
+        min_score=args.min_score,
+        max_score=args.max_score,
+        lacking=args.lacking,
+        having=args.having,
+        since=time.time() - args.days * 86400 if args.days else None,
+        scoring_mode=None if args.mode == "all" else args.mode,
+        limit=args.limit,
+    )
+    for row in rows:
+        print(json.dumps(row))
+    print(f"{len(rows)} analyses in {(time.perf_counter() - start) * 1000:.1f} ms")
@@ -0,0 +1,247 @@
+import json
+import threading
+import time
+
+from jsonschema import Draft202012Validator
+
+from models import model_registry
+
+
+# -------------------- Output schemas -------------------- #
+# Each task answers with one object holding one array (strict JSON-schema
+# mode needs an object at the top, every property required and no extras).
+def _string_list():
+    return {"type": "array", "items": {"type": "string"}}
+
+
+def _array_schema(key, item_schema):
+    return {
+        "type": "object",
+        "properties": {key: {"type": "array", "items": item_schema}},
+        "required": [key],
+        "additionalProperties": False,
+    }
+
+
+def _object(**properties):
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": list(properties),
+        "additionalProperties": False,
+    }
+
+
+SCHEMAS = {
+    "jd_skills": _array_schema("skills", {"type": "string"}),
+    "skill_screening": _array_schema("scores", _object(
+        skill={"type": "string"},
+        score={"type": "integer"},
+        reasoning={"type": "string"},
+    )),
+    # Screening fused with weakness generation (empty strings/lists for strong skills)
+    "skill_assessment": _array_schema("scores", _object(
+        skill={"type": "string"},
+        score={"type": "integer"},
+        reasoning={"type": "string"},
+        detail={"type": "string"},
+        suggestions=_string_list(),
+        example={"type": "string"},
+    )),
+    "weaknesses": _array_schema("weaknesses", _object(
+        skill={"type": "string"},
+        detail={"type": "string"},
+        suggestions=_string_list(),
+        example={"type": "string"},
+    )),
+    "interview_questions": _array_schema("questions", _object(
+        type={"type": "string"},
+        question={"type": "string"},
+    )),
+    "improvements": _array_schema("areas", _object(
+        area={"type": "string"},
+        description={"type": "string"},
+        specific=_string_list(),
+        before={"type": "string"},
+        after={"type": "string"},
+    )),
+}
+
+_item_validators = {
+    name: Draft202012Validator(next(iter(schema["properties"].values()))["items"])
+    for name, schema in SCHEMAS.items()
+}
+
+
+# -------------------- Streaming JSON parser -------------------- #
+class JSONArrayStream:
+    """Incremental parser for the items of the first JSON array in a text stream.
+
+    Feed it chunks as they arrive; each complete item is returned as soon as
+    the comma (or closing bracket) after it is seen. Anything before the
+    array (code fences, the wrapping object's key) is skipped. If the stream
+    breaks off or goes malformed, every item before the damage is kept and
+    `prefix_end` marks where the valid part of the buffer ends.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.pos = 0
+        self.depth = 0
+        self.array_depth = None  # nesting depth of the items, once the array opened
+        self.in_string = False
+        self.escape = False
+        self.item_start = None
+        self.prefix_end = 0
+        self.complete = False
+        self.bad_items = 0
+
+    def feed(self, text):
+        self.buffer += text
+        items = []
+        buffer = self.buffer
+
+        while self.pos < len(buffer) and not self.complete:
+            ch = buffer[self.pos]
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif ch == "\\":
+                    self.escape = True
+                elif ch == '"':
+                    self.in_string = False
+            elif ch == '"':
+                self._start_item()
+                self.in_string = True
+            elif ch in "[{":
+                if self.array_depth is None and ch == "[":
+                    self.array_depth = self.depth + 1
+                else:
+                    self._start_item()
+                self.depth += 1
+            elif ch in "]}":
+                if self.array_depth is not None and self.depth == self.array_depth:
+                    self._end_item(items)
+                    self.complete = True
+                self.depth -= 1
+            elif ch == "," and self.depth == self.array_depth:
+                self._end_item(items)
+            elif not ch.isspace():
+                self._start_item()
+            self.pos += 1
+
+        return items
+
+    def _start_item(self):
+        if self.depth == self.array_depth and self.item_start is None:
+            self.item_start = self.pos
+
+    def _end_item(self, items):
+        if self.item_start is not None:
+            try:
+                items.append(json.loads(self.buffer[self.item_start:self.pos]))
+            except ValueError:
+                self.bad_items += 1
+            self.item_start = None
+        self.prefix_end = self.pos + 1
+
+
+# -------------------- Parse-failure tracking -------------------- #
+class ParseStats:
+    """Per-schema outcome counts: ok, repaired (tail re-requested) or failed."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {}
+
+    def record(self, schema_name, outcome):
+        with self._lock:
+            counts = self._counts.setdefault(
+                schema_name, {"ok": 0, "repaired": 0, "failed": 0}
+            )
+            counts[outcome] += 1
+
+    def snapshot(self):
+        with self._lock:
+            report = {}
+            for name, counts in self._counts.items():
+                calls = sum(counts.values())
+                report[name] = dict(
+                    counts,
+                    calls=calls,
+                    parse_failure_rate=(counts["repaired"] + counts["failed"]) / calls,
+                )
+            return report
+
+
+parse_stats = ParseStats()
+
+
+# -------------------- Structured calls -------------------- #
+def _bind_schema(llm, schema_name):
+    return llm.bind(response_format={
+        "type": "json_schema",
+        "json_schema": {"name": schema_name, "schema": SCHEMAS[schema_name], "strict": True},
+    })
+
+
+def _stream_items(llm, prompt, schema_name, task=None, on_item=None):
+    """One streamed call -> (valid items, whether the array closed)."""
+    validator = _item_validators[schema_name]
+    parser = JSONArrayStream()
+    items = []
+    response = None
+    start = time.perf_counter()
+
+    try:
+        for chunk in _bind_schema(llm, schema_name).stream(prompt):
+            response = chunk if response is None else response + chunk
+            for item in parser.feed(chunk.content or ""):
+                if validator.is_valid(item):
+                    items.append(item)
+                    if on_item:
+                        on_item(item)
+                else:
+                    parser.bad_items += 1
+    except Exception as e:
+        print(f"Error streaming {schema_name} output: {e}")
+
+    if task:
+        model_registry.record(
+            task, llm.model_name, time.perf_counter() - start, response,
+            error=not parser.complete,
+        )
+    return items, parser.complete and not parser.bad_items
+
+
+def continuation_prompt(prompt, items):
+    """Generic tail repair: ask only for what comes after the items we kept."""
+    return f"""{prompt}
+
+Your previous answer was cut off. These items were received intact:
+{json.dumps(items, ensure_ascii=False)}
+Return ONLY the remaining items in the same JSON format. Do not repeat the items above.
+"""
+
+
+def generate_structured(llm, prompt, schema_name, task=None, on_item=None, repair_prompt=None):
+    """Schema-constrained LLM call; returns the list of valid items.
+
+    The response is parsed while it streams, so on_item(item) fires as each
+    item completes. If the JSON breaks (cut off, malformed tail, invalid
+    items) the intact prefix is kept and only the missing tail is requested:
+    repair_prompt(items) -> prompt (None when nothing is missing), else a
+    generic continuation. Returns [] if nothing usable came back.
+    """
+    items, complete = _stream_items(llm, prompt, schema_name, task, on_item)
+    if complete:
+        parse_stats.record(schema_name, "ok")
+        return items
+
+    tail_prompt = repair_prompt(items) if repair_prompt else continuation_prompt(prompt, items)
+    if tail_prompt:
+        tail, complete = _stream_items(llm, tail_prompt, schema_name, task, on_item)
+        items += tail
+    # Nothing was repaired when no tail was requested: the output stays a failure
+    parse_stats.record(schema_name, "repaired" if tail_prompt and complete else "failed")
+    return items
@@ -0,0 +1,169 @@
+"""Process warm-up and readiness for server workers.
+
+The first analysis in a fresh process pays for cold imports, the first TLS
+handshake with the API, FAISS/numpy initialisation and matplotlib's font
+cache. WarmUp runs all of that once at process start; a worker reports
+ready (api_server's GET /readyz) only after it has finished, so a load
+balancer doing rolling restarts never routes a request to a cold worker.
+
+Set RESUME_WARMUP_NETWORK=0 to skip opening API connections (offline runs).
+"""
+import importlib
+import os
+import threading
+import time
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from models import model_registry, openai_base_url, shared_http_client
+
+
+# Imported lazily by the app (see agents.py), so preload them here instead
+PRELOAD_MODULES = [
+    "langchain_openai",
+    "langchain_community.vectorstores",
+    "langchain_text_splitters",
+    "PyPDF2",
+    "docx",
+    "pdf_renderer",
+    "agents",
+]
+
+
+# -------------------- Warm-up steps -------------------- #
+def preload_modules():
+    for module in PRELOAD_MODULES:
+        importlib.import_module(module)
+
+
+def open_connections():
+    """TLS-connect every pooled HTTP client the app will use.
+
+    An unauthenticated GET /models is enough: it answers 401 and leaves a
+    live keep-alive connection in the pool. Chat clients are pooled per
+    timeout, so one request goes out per distinct timeout.
+    """
+    if os.environ.get("RESUME_WARMUP_NETWORK", "1") == "0":
+        return
+    url = f"{openai_base_url()}/models"
+
+    shared_http_client().get(url)
+
+    timeouts = {}
+    for task in list(model_registry.tasks):
+        timeouts.setdefault(model_registry.spec(task).get("timeout"), task)
+    for task in timeouts.values():
+        llm = model_registry.chat(task, api_key="warmup")
+        try:
+            llm.root_client.with_options(max_retries=0).models.list()
+        except Exception:  # 401 is expected; the connection is what we wanted
+            pass
+
+
+class HashEmbeddings(Embeddings):
+    """Offline stand-in embeddings for the FAISS warm-up build."""
+
+    dimensions = 64
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text):
+        rng = np.random.default_rng(abs(hash(text)) % (2 ** 32))
+        return rng.standard_normal(self.dimensions).astype("float32").tolist()
+
+
+def build_tiny_index():
+    from langchain_community.vectorstores import FAISS
+
+    store = FAISS.from_texts(
+        ["Python developer", "Led a team of five", "BSc Computer Science"],
+        HashEmbeddings(),
+    )
+    store.similarity_search("team lead", k=1)
+
+
+def render_dummy_chart():
+    """Builds matplotlib's font cache (seconds on a fresh container)."""
+    import io
+
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(1, 1))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    ax.pie([75, 25])
+    ax.text(0, 0, "75%", fontweight="bold")
+    fig.savefig(io.BytesIO(), format="png")
+
+
+DEFAULT_STEPS = [
+    ("preload_modules", preload_modules),
+    ("open_connections", open_connections),
+    ("build_tiny_index", build_tiny_index),
+    ("render_dummy_chart", render_dummy_chart),
+]
+
+
+# -------------------- Readiness -------------------- #
+class WarmUp:
+    """Runs the warm-up steps once and tracks readiness.
+
+    A failing step is logged and reported in status() but does not keep the
+    process unready forever: the worker still serves, just colder.
+    """
+
+    def __init__(self, steps=None):
+        self.steps = steps or DEFAULT_STEPS
+        self.ready = threading.Event()
+        self.steps_done = {}  # name -> {"seconds": ..., "error": ...}
+        self.started_at = None
+        self.finished_at = None
+        self._lock = threading.Lock()
+
+    def run(self):
+        """Run every step (blocking); later calls return once the first finishes."""
+        with self._lock:
+            if self.ready.is_set():
+                return
+            self.started_at = time.time()
+            for name, step in self.steps:
+                start = time.perf_counter()
+                error = None
+                try:
+                    step()
+                except Exception as e:
+                    print(f"Warm-up step {name} failed: {e}")
+                    error = str(e)
+                self.steps_done[name] = {
+                    "seconds": round(time.perf_counter() - start, 3),
+                    "error": error,
+                }
+            self.finished_at = time.time()
+            self.ready.set()
+
+    def start(self):
+        """Run in a background thread (so liveness probes answer meanwhile)."""
+        thread = threading.Thread(target=self.run, name="warmup", daemon=True)
+        thread.start()
+        return thread
+
+    def status(self):
+        return {
+            "ready": self.ready.is_set(),
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "steps": dict(self.steps_done),
+        }
+
+
+warmup = WarmUp()
+
+
+if __name__ == "__main__":
+    import json
+
+    warmup.run()
+    print(json.dumps(warmup.status(), indent=2))